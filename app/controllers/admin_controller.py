@@ -3,13 +3,13 @@ import csv
 from fastapi.responses import StreamingResponse
 from typing import Optional
 from fastapi import BackgroundTasks, status
-from sqlalchemy import asc, case, desc, func, or_
+from sqlalchemy import and_, asc, case, desc, func, or_, select, true
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 from datetime import date, datetime, timezone
 
 # Schemas
 from app import schemas
+from app.models.ledger import LedgerEntry
 from app.models.loan import Loan, LoanType
 from app.models.rbac import Permission, Role, RolePermission
 from app.models.user import User
@@ -27,16 +27,19 @@ from app.schemas.admin_schema import AdminUpdate, AdminPasswordUpdate
 
 # Models
 from app.models.admin import Admin
-from app.models.deposit import Deposit
-from app.models.transfer import Transfer
-from app.models.withdrawal import Withdrawal
 
 # Core
-from app.core.utils import hash_password, check_unique_field
+from app.core.utils import hash_password, verify_password, check_unique_field
 from app.core.exceptions import CustomHTTPException, DatabaseError
 from app.core.schemas import PaginatedResponse
-from app.core.auth import create_access_token, create_refresh_token
+from app.core.auth import (
+    create_access_token,
+    create_refresh_token,
+    invalidate_principal,
+)
+from app.core.rbac import permission_claims
 from app.core.responses import success_response
+from app.core.rollups import loan_totals, transaction_totals
 from app.schemas.card_schema import CardResponse
 from app.schemas.deposit_schema import DepositResponse
 from app.schemas.loan_schema import LoanResponse
@@ -44,8 +47,6 @@ from app.schemas.transfer_schema import TransferResponse
 from app.schemas.user_schema import Order, SortBy, UserResponseData, UserUpdate
 from app.schemas.withdrawal_schema import WithdrawalResponse
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 
 def register_admin(admin: AdminCreate, db: Session):
     check_unique_field(db, Admin, "Email", admin.Email)
@@ -74,7 +75,7 @@ def register_admin(admin: AdminCreate, db: Session):
 
 def login_admin(admin: AdminLogin, db: Session):
     admin_db = db.query(Admin).filter(Admin.Email == admin.Email).first()
-    if not admin_db or not pwd_context.verify(admin.Password, admin_db.Password):
+    if not admin_db or not verify_password(admin.Password, admin_db.Password):
         raise CustomHTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             message="Invalid email or password",
@@ -100,7 +101,11 @@ def login_admin(admin: AdminLogin, db: Session):
     db.commit()
 
     access_token = create_access_token(
-        data={"sub": str(admin_db.AdminID), "role_id": admin_db.RoleID}
+        data={
+            "sub": str(admin_db.AdminID),
+            "role_id": admin_db.RoleID,
+            **permission_claims(admin_db.RoleID, db),
+        }
     )
     refresh_token = create_refresh_token(
         data={"sub": str(admin_db.AdminID), "role_id": admin_db.RoleID}
@@ -222,6 +227,7 @@ def update_other_admin(
 
     try:
         db.commit()
+        invalidate_principal("admin", admin_id)
         db.refresh(admin)
         return success_response(
             message="Admin updated successfully",
@@ -258,6 +264,7 @@ def toggle_user_active_status(user_id: int, current_admin_id: int, db: Session):
         user.ApprovedByAdminID = None
 
     db.commit()
+    invalidate_principal("user", user_id)
     return success_response(
         message=f"User status updated successfully. New status: {'Active' if user.IsActive else 'Inactive'}",
         data={
@@ -354,7 +361,7 @@ def update_user(user_id: int, user_update: UserUpdate, db: Session):
     # Handle password update if provided
     update_data = user_update.model_dump(exclude_unset=True)
     if "Password" in update_data:
-        user.Password = pwd_context.hash(
+        user.Password = hash_password(
             update_data.pop("Password")
         )  # Hash and remove from update_data
 
@@ -364,6 +371,7 @@ def update_user(user_id: int, user_update: UserUpdate, db: Session):
 
     try:
         db.commit()
+        invalidate_principal("user", user_id)
         db.refresh(user)
         return success_response(
             message="User updated successfully",
@@ -404,9 +412,32 @@ def delete_user(user_id: int, db: Session):
             message="Cannot delete user with non-zero balance",
         )
 
+    # Loan legs go with the loans they record, which cascade with the user.
+    # Any other leg records a transaction that outlives the user.
+    loan_legs = LedgerEntry.TransactionType.in_(["LoanDisbursement", "LoanPayment"])
+    ledger_history = (
+        db.query(LedgerEntry.EntryID)
+        .filter(
+            or_(
+                and_(LedgerEntry.UserID == user_id, ~loan_legs),
+                LedgerEntry.CounterpartyID == user_id,
+            )
+        )
+        .first()
+    )
+    if ledger_history:
+        raise CustomHTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            message="Cannot delete user with transaction history in the ledger",
+        )
+
     try:
+        db.query(LedgerEntry).filter(LedgerEntry.UserID == user_id, loan_legs).delete(
+            synchronize_session=False
+        )
         db.delete(user)
         db.commit()
+        invalidate_principal("user", user_id)
         return success_response(
             message="User deleted successfully", data={"UserID": user_id}
         )
@@ -420,69 +451,57 @@ def delete_user(user_id: int, db: Session):
 
 
 def get_analytics_summary(db: Session):
-    # Total Users
-    total_users = db.query(User).count()
-    active_users = db.query(User).filter(User.IsActive == True).count()
+    """
+    Platform-wide totals for the admin dashboard.
+
+    Transaction and loan totals come from the rollup tables rather than the
+    transaction tables. Each source is aggregated into a one-row derived
+    table, and the derived tables are cross-joined so the whole summary is a
+    single round trip.
+    """
+    users = select(
+        func.count().label("total_users"),
+        func.count(case((User.IsActive == True, 1))).label("active_users"),
+        func.avg(User.Balance).label("avg_user_balance"),
+    ).subquery()
+    transactions = transaction_totals()
+    loans = loan_totals()
+    roles = select(func.count().label("total_roles")).select_from(Role).subquery()
+    permissions = (
+        select(func.count().label("total_permissions"))
+        .select_from(Permission)
+        .subquery()
+    )
+    role_permissions = select(
+        func.count(func.distinct(RolePermission.RoleID)).label("roles_with_permissions")
+    ).subquery()
+
+    sources = [users, transactions, loans, roles, permissions, role_permissions]
+    summary = users
+    for source in sources[1:]:
+        summary = summary.join(source, true())
+    row = db.execute(select(*sources).select_from(summary)).one()
+
+    total_users = row.total_users
+    active_users = row.active_users
     inactive_users = total_users - active_users
 
-    # Total Transaction Volume
-    deposit_total = (
-        db.query(func.sum(Deposit.Amount))
-        .filter(Deposit.Status == "Completed")
-        .scalar()
-        or 0
-    )
-    transfer_total = (
-        db.query(func.sum(Transfer.Amount))
-        .filter(Transfer.Status == "Completed")
-        .scalar()
-        or 0
-    )
-    withdrawal_total = (
-        db.query(func.sum(Withdrawal.Amount))
-        .filter(Withdrawal.Status == "Completed")
-        .scalar()
-        or 0
-    )
+    deposit_total = row.deposit_total or 0
+    transfer_total = row.transfer_sent_total or 0
+    withdrawal_total = row.withdrawal_total or 0
     total_transaction_volume = float(deposit_total + transfer_total + withdrawal_total)
 
-    # Total Loan Amounts
-    total_loan_amount = (
-        db.query(func.sum(Loan.LoanAmount))
-        .filter(Loan.LoanStatus == "Approved")
-        .scalar()
-        or 0
-    )
-    total_loan_count = db.query(Loan).filter(Loan.LoanStatus == "Approved").count()
-
-    # Pending Loans
-    pending_loan_count = db.query(Loan).filter(Loan.LoanStatus == "Pending").count()
-    pending_loan_amount = (
-        db.query(func.sum(Loan.LoanAmount))
-        .filter(Loan.LoanStatus == "Pending")
-        .scalar()
-        or 0
-    )
-
-    # Repaid Loans
-    repaid_loan_count = db.query(Loan).filter(Loan.LoanStatus == "Repaid").count()
+    total_loan_amount = row.approved_amount or 0
+    total_loan_count = row.approved_count or 0
+    pending_loan_count = row.pending_count or 0
+    pending_loan_amount = row.pending_amount or 0
+    repaid_loan_count = row.repaid_count or 0
 
-    # Average User Balance
-    avg_user_balance = db.query(func.avg(User.Balance)).scalar() or 0
+    avg_user_balance = row.avg_user_balance or 0
 
-    # RBAC Metrics
-    total_roles = db.query(Role).count()
-    total_permissions = db.query(Permission).count()
-
-    # Adjusted query to explicitly select only RoleID and avoid unnecessary columns
-    subquery = (
-        db.query(Role.RoleID)
-        .join(RolePermission, Role.RoleID == RolePermission.RoleID, isouter=True)
-        .group_by(Role.RoleID)
-        .having(func.count(RolePermission.PermissionID) > 0)
-        .subquery()
-    )
-    roles_with_permissions = db.query(func.count()).select_from(subquery).scalar() or 0
+    total_roles = row.total_roles
+    total_permissions = row.total_permissions
+    roles_with_permissions = row.roles_with_permissions
 
     return success_response(
         message="Analytics summary retrieved successfully",
@@ -589,12 +608,12 @@ def update_admin_password(
         raise CustomHTTPException(
             status_code=status.HTTP_404_NOT_FOUND, message="Admin not found"
         )
-    if not pwd_context.verify(password_update.CurrentPassword, admin.Password):
+    if not verify_password(password_update.CurrentPassword, admin.Password):
         raise CustomHTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             message="Current password is incorrect",
         )
-    admin.Password = pwd_context.hash(password_update.NewPassword)
+    admin.Password = hash_password(password_update.NewPassword)
     try:
         db.commit()
         db.commit()
@@ -636,6 +655,7 @@ def delete_admin(admin_id: int, current_admin_id: int, db: Session):
         db.delete(admin)
         db.commit()
         db.commit()
+        invalidate_principal("admin", admin_id)
         return success_response(
             message="Admin deleted successfully", data={"AdminID": admin_id}
         )
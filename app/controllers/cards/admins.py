@@ -6,7 +6,7 @@ from app.models.card import Card
 from app.schemas.card_schema import CardUpdate, CardResponse
 from app.core.responses import success_response
 from app.core.exceptions import CustomHTTPException
-from app.core.auth import pwd_context
+from app.core.utils import hash_password
 
 
 def get_card_by_id(card_id: int, db: Session):
@@ -121,7 +121,7 @@ def update_card_admin(card_id: int, card_update: CardUpdate, db: Session):
 
     update_data = card_update.model_dump(exclude_unset=True)
     if "Pin" in update_data:
-        update_data["Pin"] = pwd_context.hash(update_data["Pin"])
+        update_data["Pin"] = hash_password(update_data["Pin"])
 
     for key, value in update_data.items():
         setattr(card, key, value)
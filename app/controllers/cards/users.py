@@ -6,7 +6,7 @@ from app.models.card import Card
 from app.schemas.card_schema import CardCreate, CardUpdate, CardResponse
 from app.core.responses import success_response
 from app.core.exceptions import CustomHTTPException
-from app.core.auth import pwd_context
+from app.core.utils import hash_password
 from fastapi import status
 
 
@@ -29,7 +29,7 @@ def create_card(user_id: int, card: CardCreate, db: Session):
     new_card = Card(
         UserID=user_id,
         CardNumber=card.CardNumber,
-        Pin=pwd_context.hash(card.Pin),
+        Pin=hash_password(card.Pin),
         ExpirationDate=card.ExpirationDate,
         Status="Active",
     )
@@ -111,7 +111,7 @@ def update_card(user_id: int, card_id: int, card_update: CardUpdate, db: Session
 
     update_data = card_update.model_dump(exclude_unset=True)
     if "Pin" in update_data:
-        update_data["Pin"] = pwd_context.hash(update_data["Pin"])
+        update_data["Pin"] = hash_password(update_data["Pin"])
     if "Status" in update_data and update_data["Status"] == "Blocked":
         raise CustomHTTPException(
             status_code=403, message="Users cannot block their own cards"
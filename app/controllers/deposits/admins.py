@@ -1,6 +1,7 @@
-from datetime import date
+from datetime import date, datetime, timezone
 from typing import Optional
-from sqlalchemy import asc, desc
+from sqlalchemy import asc, desc, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from decimal import Decimal
 from app.core.schemas import PaginatedResponse
@@ -9,7 +10,10 @@ from app.models.user import User
 from app.schemas.deposit_schema import DepositCreate, DepositResponse
 from app.core.responses import success_response
 from app.core.exceptions import CustomHTTPException
+from app.core.idempotency import record_response
 from app.core.event_emitter import emit_event
+from app.core.ledger import post_ledger_entry
+from app.core.rollups import record_transaction_rollup
 from fastapi import status
 import uuid
 from fastapi import BackgroundTasks
@@ -59,10 +63,10 @@ async def create_deposit(
     user_id: int,
     admin_id: int,
     deposit: DepositCreate,
-    db: Session,
+    db: AsyncSession,
     background_tasks: BackgroundTasks,
 ):
-    user = db.query(User).filter(User.UserID == user_id).with_for_update().first()
+    user = await db.scalar(select(User).where(User.UserID == user_id).with_for_update())
     if not user:
         raise CustomHTTPException(
             status_code=status.HTTP_404_NOT_FOUND, message="User not found"
@@ -82,14 +86,37 @@ async def create_deposit(
         ReferenceNumber=str(uuid.uuid4()),
         Status="Pending",
         Description=deposit.Description or "Admin-initiated deposit",
+        CreatedAt=datetime.now(timezone.utc),  # UTC, like transfers
     )
 
     try:
         user.Balance += amount
         new_deposit.Status = "Completed"
         db.add(new_deposit)
-        db.commit()
-        db.refresh(new_deposit)
+        await db.flush()  # Assign DepositID for the ledger entry
+        await db.run_sync(
+            post_ledger_entry,
+            user,
+            "Deposit",
+            new_deposit.DepositID,
+            amount,
+            reference_number=new_deposit.ReferenceNumber,
+            description=new_deposit.Description,
+        )
+        await db.run_sync(
+            record_transaction_rollup,
+            user_id,
+            "Deposit",
+            new_deposit.Status,
+            amount,
+            new_deposit.CreatedAt.date(),
+        )
+        response = success_response(
+            message="Deposit completed successfully",
+            data=DepositResponse.model_validate(new_deposit).model_dump(),
+        )
+        record_response(db, response)  # Completes the Idempotency-Key, if any
+        await db.commit()
 
         # Emit real-time notification to user
         await emit_event(
@@ -117,12 +144,9 @@ async def create_deposit(
             background_tasks=background_tasks,
         )
 
-        return success_response(
-            message="Deposit completed successfully",
-            data=DepositResponse.model_validate(new_deposit).model_dump(),
-        )
+        return response
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise CustomHTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             message="Deposit failed",
@@ -1,4 +1,5 @@
 from decimal import Decimal
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import func, asc, desc, text
 from app.models.loan import Loan, LoanType
@@ -13,6 +14,8 @@ from datetime import date
 from typing import Optional
 from fastapi import BackgroundTasks
 from app.core.event_emitter import emit_event
+from app.core.ledger import post_ledger_entry
+from app.core.rollups import move_loan_rollup
 
 
 def get_loan_by_id(loan_id: int, db: Session):
@@ -44,10 +47,10 @@ def get_loan_by_id(loan_id: int, db: Session):
 async def approve_loan(
     loan_id: int,
     current_admin: Admin,
-    db: Session,
+    db: AsyncSession,
     background_tasks: BackgroundTasks,
 ):
-    loan = db.query(Loan).filter(Loan.LoanID == loan_id).first()
+    loan = await db.get(Loan, loan_id)
     if not loan:
         raise CustomHTTPException(
             status_code=status.HTTP_404_NOT_FOUND, message="Loan not found"
@@ -59,8 +62,9 @@ async def approve_loan(
         )
 
     try:
+        previous_status = loan.LoanStatus
         loan.LoanStatus = "Approved"
-        user = db.query(User).filter(User.UserID == loan.UserID).first()
+        user = await db.get(User, loan.UserID, with_for_update=True)
         if not user:
             raise CustomHTTPException(status_code=404, message="User not found")
         loan_amount = Decimal(str(loan.LoanAmount))
@@ -68,8 +72,23 @@ async def approve_loan(
 
         # Update user balance
         user.Balance = float(user_balance + loan_amount)
+        await db.run_sync(
+            post_ledger_entry,
+            user,
+            "LoanDisbursement",
+            loan.LoanID,
+            loan_amount,
+            description=f"Loan {loan.LoanID} disbursement",
+        )
+        await db.run_sync(
+            move_loan_rollup,
+            loan.UserID,
+            loan_amount,
+            from_status=previous_status,
+            to_status="Approved",
+        )
 
-        db.commit()
+        await db.commit()
 
         # Emit notification to the loan applicant (user)
         await emit_event(
@@ -98,10 +117,10 @@ async def approve_loan(
 
         return success_response(
             message="Loan approved successfully",
-            data={"LoanID": loan_id, "LoanStatus": "Approved"},
+            data={"LoanID": loan_id, "UserID": loan.UserID, "LoanStatus": "Approved"},
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise CustomHTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             message="Failed to approve loan",
@@ -112,10 +131,10 @@ async def approve_loan(
 async def reject_loan(
     loan_id: int,
     current_admin: Admin,
-    db: Session,
+    db: AsyncSession,
     background_tasks: BackgroundTasks,
 ):
-    loan = db.query(Loan).filter(Loan.LoanID == loan_id).first()
+    loan = await db.get(Loan, loan_id)
     if not loan:
         raise CustomHTTPException(
             status_code=status.HTTP_404_NOT_FOUND, message="Loan not found"
@@ -128,7 +147,14 @@ async def reject_loan(
 
     try:
         loan.LoanStatus = "Rejected"
-        db.commit()
+        await db.run_sync(
+            move_loan_rollup,
+            loan.UserID,
+            loan.LoanAmount,
+            from_status="Pending",
+            to_status="Rejected",
+        )
+        await db.commit()
 
         await emit_event(
             "loan_status_updated",
@@ -156,10 +182,10 @@ async def reject_loan(
 
         return success_response(
             message="Loan rejected successfully",
-            data={"LoanID": loan_id, "LoanStatus": "Rejected"},
+            data={"LoanID": loan_id, "UserID": loan.UserID, "LoanStatus": "Rejected"},
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise CustomHTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             message="Failed to reject loan",
@@ -12,6 +12,8 @@ from app.schemas.loan_schema import (
 from app.core.responses import success_response
 from app.core.schemas import PaginatedResponse
 from app.core.exceptions import CustomHTTPException
+from app.core.ledger import post_ledger_entry
+from app.core.rollups import move_loan_rollup
 from fastapi import status
 from datetime import date
 from typing import Optional
@@ -55,6 +57,7 @@ def apply_loan(user_id: int, loan: LoanApply, db: Session):
     )
     try:
         db.add(new_loan)
+        move_loan_rollup(db, user_id, new_loan.LoanAmount, to_status="Pending")
         db.commit()
         db.refresh(new_loan)
         return success_response(
@@ -97,8 +100,8 @@ def make_loan_payment(user_id: int, payment: LoanPaymentCreate, db: Session):
             message="Payment amount must be positive",
         )
 
-    # Fetch the user to check balance
-    user = db.query(User).filter(User.UserID == user_id).first()
+    # Fetch and lock the user to check balance
+    user = db.query(User).filter(User.UserID == user_id).with_for_update().first()
     if not user:
         raise CustomHTTPException(
             status_code=status.HTTP_404_NOT_FOUND, message="User not found"
@@ -177,6 +180,15 @@ def make_loan_payment(user_id: int, payment: LoanPaymentCreate, db: Session):
 
         # Add payment and update loan
         db.add(new_payment)
+        db.flush()  # Assign PaymentID for the ledger entry
+        post_ledger_entry(
+            db,
+            user,
+            "LoanPayment",
+            new_payment.PaymentID,
+            -total_amount_deducted,
+            description=f"Loan {loan.LoanID} payment",
+        )
 
         # Shift the due date forward by one month
         loan.DueDate = loan.DueDate + relativedelta(months=1)
@@ -195,6 +207,13 @@ def make_loan_payment(user_id: int, payment: LoanPaymentCreate, db: Session):
         ).scalar() or Decimal("0")
         if (total_paid + total_late_fees_paid) >= total_due_with_late_fees:
             loan.LoanStatus = "Repaid"
+            move_loan_rollup(
+                db,
+                loan.UserID,
+                loan.LoanAmount,
+                from_status="Approved",
+                to_status="Repaid",
+            )
             db.commit()
 
         # Prepare response data
@@ -1,6 +1,7 @@
 # app/controllers/rbac.py
 from sqlalchemy.orm import Session
 from app.core.exceptions import CustomHTTPException
+from app.core.rbac import invalidate_role_permissions
 from app.models.admin import Admin
 from app.models.rbac import Role, Permission, RolePermission
 from app.schemas.rbac_schema import (
@@ -205,6 +206,7 @@ def assign_permissions_to_role(rp: RolePermissionCreate, db: Session):
 
     try:
         db.add_all(new_role_permissions)
+        invalidate_role_permissions(db)
         db.commit()
         assigned_count = len(new_role_permissions)
         return success_response(
@@ -272,6 +274,7 @@ def delete_role(role_id: int, db: Session):
 
     try:
         db.delete(role)
+        invalidate_role_permissions(db)
         db.commit()
         return success_response(
             message="Role deleted successfully", data={"RoleID": role_id}
@@ -308,6 +311,7 @@ def update_permission(permission_id: int, perm_update: PermissionUpdate, db: Ses
         setattr(permission, key, value)
 
     try:
+        invalidate_role_permissions(db)  # A rename moves the name to another bit
         db.commit()
         db.refresh(permission)
         return success_response(
@@ -347,6 +351,7 @@ def delete_permission(permission_id: int, db: Session):
 
     try:
         db.delete(permission)
+        invalidate_role_permissions(db)
         db.commit()
         return success_response(
             message="Permission deleted successfully",
@@ -418,6 +423,7 @@ def remove_permissions_from_role(rp_remove: RolePermissionRemove, db: Session):
     try:
         for rp in role_permissions_to_remove:
             db.delete(rp)
+        invalidate_role_permissions(db)
         db.commit()
         return success_response(
             message=f"Removed {len(role_permissions_to_remove)} permission(s) from role successfully",
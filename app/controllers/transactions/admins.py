@@ -1,6 +1,3 @@
-import csv
-from io import StringIO
-from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, asc, desc, select, union, union_all, literal
 from app.core.responses import success_response
@@ -13,6 +10,14 @@ from app.schemas.deposit_schema import DepositResponse
 from app.schemas.withdrawal_schema import WithdrawalResponse
 from app.core.schemas import PaginatedResponse
 from app.core.exceptions import CustomHTTPException
+from app.controllers.transactions.feed import get_transaction_feed_page
+from app.controllers.transactions.exports import (
+    build_export_statement,
+    export_filename,
+    stream_transactions_export,
+    validate_export_format,
+)
+from app.controllers.transactions.export_jobs import submit_export_job
 from fastapi import status
 from datetime import date, datetime
 from typing import Optional
@@ -145,138 +150,29 @@ def export_transactions(
     end_date: Optional[datetime] = None,
     transaction_status: Optional[str] = None,
     transaction_type: Optional[str] = None,
+    background: bool = False,
+    export_format: str = "csv",
+    admin_id: Optional[int] = None,
 ):
-    # Alias for User
-    UserAlias = aliased(User)
-    Receiver = aliased(User)
-
-    # Base query
-    query = (
-        db.query(
-            func.coalesce(
-                Deposit.DepositID, Transfer.TransferID, Withdrawal.WithdrawalID
-            ).label("TransactionID"),
-            UserAlias.Username.label("Username"),
-            func.coalesce(Deposit.Amount, Transfer.Amount, Withdrawal.Amount).label(
-                "Amount"
-            ),
-            func.coalesce(Deposit.Status, Transfer.Status, Withdrawal.Status).label(
-                "Status"
-            ),
-            func.coalesce(
-                Deposit.CreatedAt, Transfer.CreatedAt, Withdrawal.CreatedAt
-            ).label("CreatedAt"),
-            case(
-                (Deposit.DepositID.isnot(None), "Deposit"),
-                (Transfer.TransferID.isnot(None), "Transfer"),
-                (Withdrawal.WithdrawalID.isnot(None), "Withdrawal"),
-            ).label("TransactionType"),
-            Transfer.ReceiverID.label("ReceiverID"),
-        )
-        .select_from(UserAlias)
-        .outerjoin(Deposit, Deposit.UserID == UserAlias.UserID)
-        .outerjoin(Transfer, Transfer.SenderID == UserAlias.UserID)
-        .outerjoin(Withdrawal, Withdrawal.UserID == UserAlias.UserID)
-        .outerjoin(Receiver, Receiver.UserID == Transfer.ReceiverID)
-        .filter(
-            or_(
-                Deposit.DepositID.isnot(None),
-                Transfer.TransferID.isnot(None),
-                Withdrawal.WithdrawalID.isnot(None),
-            )
-        )
-    )
-
-    # Apply filters
-    if user_id:
-        query = query.filter(UserAlias.UserID == user_id)
-    if start_date:
-        query = query.filter(
-            func.coalesce(Deposit.CreatedAt, Transfer.CreatedAt, Withdrawal.CreatedAt)
-            >= start_date
-        )
-    if end_date:
-        query = query.filter(
-            func.coalesce(Deposit.CreatedAt, Transfer.CreatedAt, Withdrawal.CreatedAt)
-            <= end_date
-        )
-    if transaction_status:
-        if transaction_status not in ["Pending", "Completed", "Failed"]:
-            raise CustomHTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                message="Invalid transaction status value",
-            )
-        query = query.filter(
-            func.coalesce(Deposit.Status, Transfer.Status, Withdrawal.Status)
-            == transaction_status
-        )
-    if transaction_type:
-        if transaction_type not in ["Deposit", "Transfer", "Withdrawal"]:
-            raise CustomHTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                message="Invalid transaction type",
-            )
-        if transaction_type == "Deposit":
-            query = query.filter(Deposit.DepositID.isnot(None))
-        elif transaction_type == "Transfer":
-            query = query.filter(Transfer.TransferID.isnot(None))
-        elif transaction_type == "Withdrawal":
-            query = query.filter(Withdrawal.WithdrawalID.isnot(None))
-
-    # Execute query
-    transactions = query.all()
-
-    if not transactions:
-        raise CustomHTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            message="No transactions found for export",
-        )
-
-    # Create CSV in memory
-    output = StringIO()
-    writer = csv.writer(output, quoting=csv.QUOTE_MINIMAL)
-
-    # Write headers
-    headers = [
-        "TransactionID",
-        "Username",
-        "Amount",
-        "Status",
-        "CreatedAt",
-        "TransactionType",
-        "ReceiverUsername",
-    ]
-    writer.writerow(headers)
-
-    # Fetch receiver usernames for transfers
-    receiver_ids = {t.ReceiverID for t in transactions if t.ReceiverID}
-    receivers = (
-        db.query(User.UserID, User.Username).filter(User.UserID.in_(receiver_ids)).all()
+    export_format = validate_export_format(export_format)
+    filename = export_filename(
+        "transactions_export", datetime.now().strftime("%Y%m%d_%H%M%S"), export_format
     )
-    receiver_map = {r.UserID: r.Username for r in receivers}
-
-    # Write rows
-    for t in transactions:
-        receiver_username = receiver_map.get(t.ReceiverID, "") if t.ReceiverID else ""
-        writer.writerow(
-            [
-                t.TransactionID,
-                t.Username,
-                f"{float(t.Amount):.2f}",
-                t.Status,
-                t.CreatedAt.strftime("%Y-%m-%d %H:%M:%S") if t.CreatedAt else "",
-                t.TransactionType,
-                receiver_username,
-            ]
+    filters = {
+        "user_id": user_id,
+        "transaction_type": transaction_type,
+        "transaction_status": transaction_status,
+        "start_date": start_date,
+        "end_date": end_date,
+    }
+    if background:
+        return submit_export_job(
+            f"admin:{admin_id}", filename, filters, export_format
         )
 
-    # Prepare streaming response
-    output.seek(0)
-    filename = f"transactions_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    # Stream the result set straight from the cursor
+    return stream_transactions_export(
+        build_export_statement(**filters), filename, export_format
     )
 
 
@@ -291,6 +187,8 @@ def get_all_transactions(
     end_date: Optional[datetime] = None,
     sort_by: Optional[str] = "CreatedAt",
     order: Optional[str] = "desc",
+    cursor: Optional[str] = None,
+    include_total: bool = False,
 ):
     # Validate or convert user_id to integer
     if user_id is not None:
@@ -302,6 +200,21 @@ def get_all_transactions(
                 message="Invalid user_id: must be an integer",
             )
 
+    # Keyset pagination: ordered by (CreatedAt, TransactionType, TransactionID)
+    if cursor is not None:
+        return get_transaction_feed_page(
+            db,
+            user_id=user_id,
+            per_page=per_page,
+            cursor=cursor,
+            transaction_type=transaction_type,
+            transaction_status=transaction_status,
+            start_date=start_date,
+            end_date=end_date,
+            order=order,
+            include_total=include_total,
+        )
+
     # Alias for Sender and Receiver User tables
     Sender = aliased(User)
     Receiver = aliased(User)
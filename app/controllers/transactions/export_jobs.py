@@ -0,0 +1,349 @@
+import multiprocessing
+import os
+import re
+import tempfile
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from redis.exceptions import RedisError
+from sqlalchemy import func, select
+from app.core.database import SessionLocal
+from app.core.exceptions import CustomHTTPException
+from app.core.rate_limiter import CACHE_TTL_LONG, get_redis_client
+from app.core.responses import error_response, success_response
+from app.controllers.transactions.exports import (
+    EXPORT_CHUNK_SIZE,
+    EXPORT_FORMATS,
+    build_export_statement,
+    encode_export,
+)
+
+EXPORT_JOB_DIR = os.getenv(
+    "EXPORT_JOB_DIR", os.path.join(tempfile.gettempdir(), "aut_bank_exports")
+)
+EXPORT_JOB_WORKERS = int(os.getenv("EXPORT_JOB_WORKERS", "2"))
+EXPORT_JOB_TTL = int(
+    os.getenv("EXPORT_JOB_TTL", str(CACHE_TTL_LONG))
+)  # Job record and file lifetime
+EXPORT_JOB_STALE_AFTER = int(
+    os.getenv("EXPORT_JOB_STALE_AFTER", "3600")
+)  # Seconds a queued or running job may go without an update
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# Mark a job Failed unless it has already completed
+_FAIL_UNLESS_COMPLETED = """
+if redis.call('hget', KEYS[1], 'status') == 'Completed' then
+    return 0
+end
+redis.call('hset', KEYS[1], 'status', 'Failed', 'error', ARGV[1],
+           'updated_at', ARGV[2])
+redis.call('expire', KEYS[1], ARGV[3])
+return 1
+"""
+
+# One pool per web worker process, created on first use
+_executor: Optional[ProcessPoolExecutor] = None
+# Jobs submitted by this process that have not finished yet
+_pending: Dict[str, Future] = {}
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # Spawned rather than forked: a fork of the web worker would inherit
+        # its pooled connections, event loop and background threads
+        _executor = ProcessPoolExecutor(
+            max_workers=EXPORT_JOB_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def _fail_job(job_id: str, error: str) -> None:
+    try:
+        get_redis_client().eval(
+            _FAIL_UNLESS_COMPLETED,
+            1,
+            _job_key(job_id),
+            error,
+            time.time(),
+            EXPORT_JOB_TTL,
+        )
+    except RedisError:
+        pass
+
+
+def _job_done(job_id: str, future: Future) -> None:
+    _pending.pop(job_id, None)
+    # run_export_job records its own failures; this catches a worker that died
+    if not future.cancelled() and future.exception() is not None:
+        _fail_job(job_id, f"Export worker failed: {future.exception()}")
+
+
+def shutdown_export_jobs() -> None:
+    """
+    Stop the export pool. Queued jobs are dropped and running ones may not get
+    to finish, so every unfinished job is marked Failed for its client to
+    request again; one that does finish still records itself as Completed.
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+    for job_id in list(_pending):
+        _fail_job(job_id, "Export was interrupted by a server restart")
+
+
+def _job_key(job_id: str) -> str:
+    return f"export_jobs:{job_id}"
+
+
+def _job_path(job_id: str, export_format: str) -> str:
+    return os.path.join(EXPORT_JOB_DIR, f"{job_id}.{EXPORT_FORMATS[export_format][1]}")
+
+
+def _update_job(job_id: str, **fields: Any) -> None:
+    redis = get_redis_client()
+    redis.hset(
+        _job_key(job_id),
+        mapping={
+            **{k: str(v) for k, v in fields.items() if v is not None},
+            "updated_at": str(time.time()),
+        },
+    )
+    redis.expire(_job_key(job_id), EXPORT_JOB_TTL)
+
+
+def _purge_expired_files() -> None:
+    """Remove export files that have outlived their job records."""
+    cutoff = datetime.now().timestamp() - EXPORT_JOB_TTL
+    for entry in os.scandir(EXPORT_JOB_DIR):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def run_export_job(
+    job_id: str, filters: Dict[str, Any], export_format: str = "csv"
+) -> None:
+    """
+    Body of a background export, executed in the process pool.
+
+    Rows are streamed from a server-side cursor and appended to a `.part` file
+    one chunk at a time; progress is published to the job record after every
+    chunk. The file is renamed into place only once it is complete, so a
+    download can never observe a truncated export.
+    """
+    path = _job_path(job_id, export_format)
+    part_path = f"{path}.part"
+    db = SessionLocal(info={"read_only": True})
+    try:
+        statement = build_export_statement(**filters)
+        total_rows = db.execute(
+            select(func.count()).select_from(statement.subquery())
+        ).scalar()
+        _update_job(job_id, status="Running", total_rows=total_rows)
+
+        result = db.execute(
+            statement.execution_options(
+                stream_results=True, yield_per=EXPORT_CHUNK_SIZE
+            )
+        )
+        rows_written = 0
+
+        def tracked_chunks():
+            nonlocal rows_written
+            for rows in result.partitions():
+                yield rows
+                rows_written += len(rows)
+                _update_job(job_id, rows_written=rows_written)
+
+        with open(part_path, "wb") as output:
+            for data in encode_export(tracked_chunks(), export_format):
+                output.write(data)
+        os.replace(part_path, path)
+
+        _update_job(
+            job_id,
+            status="Completed",
+            rows_written=rows_written,
+            size=os.path.getsize(path),
+            completed_at=datetime.now(timezone.utc).isoformat(),
+        )
+    except Exception as e:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        _update_job(job_id, status="Failed", error=str(e))
+    finally:
+        db.close()
+
+
+def submit_export_job(
+    owner: str, filename: str, filters: Dict[str, Any], export_format: str = "csv"
+):
+    """Queue an export for the process pool and return its job ID."""
+    build_export_statement(**filters)  # Reject bad filters before queueing
+
+    os.makedirs(EXPORT_JOB_DIR, exist_ok=True)
+    _purge_expired_files()
+
+    job_id = uuid.uuid4().hex
+    _update_job(
+        job_id,
+        owner=owner,
+        status="Queued",
+        filename=filename,
+        format=export_format,
+        rows_written=0,
+        created_at=datetime.now(timezone.utc).isoformat(),
+    )
+    future = _get_executor().submit(run_export_job, job_id, filters, export_format)
+    _pending[job_id] = future
+    future.add_done_callback(lambda f: _job_done(job_id, f))
+
+    return success_response(
+        message="Export job queued",
+        data={"job_id": job_id, "status": "Queued"},
+        status_code=status.HTTP_202_ACCEPTED,
+    )
+
+
+def _get_job(job_id: str, owner: str) -> Dict[str, str]:
+    job = get_redis_client().hgetall(_job_key(job_id))
+    if not job or job.get("owner") != owner:
+        raise CustomHTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, message="Export job not found"
+        )
+    return job
+
+
+def get_export_job(job_id: str, owner: str):
+    job = _get_job(job_id, owner)
+    updated_at = float(job.get("updated_at", 0))
+    if (
+        job["status"] in ("Queued", "Running")
+        and time.time() - updated_at > EXPORT_JOB_STALE_AFTER
+    ):
+        # The process that owned it died without a chance to say so
+        job["status"] = "Failed"
+        job["error"] = "Export stopped making progress"
+    total_rows = int(job["total_rows"]) if "total_rows" in job else None
+    rows_written = int(job.get("rows_written", 0))
+    progress = None
+    if job["status"] == "Completed":
+        progress = 100.0
+    elif total_rows:
+        progress = round(rows_written * 100 / total_rows, 2)
+
+    return success_response(
+        message="Export job retrieved successfully",
+        data={
+            "job_id": job_id,
+            "status": job["status"],
+            "rows_written": rows_written,
+            "total_rows": total_rows,
+            "progress": progress,
+            "size": int(job["size"]) if "size" in job else None,
+            "filename": job.get("filename"),
+            "format": job.get("format"),
+            "error": job.get("error"),
+            "created_at": job.get("created_at"),
+            "completed_at": job.get("completed_at"),
+        },
+    )
+
+
+def _parse_range(range_header: Optional[str], size: int):
+    """
+    Resolve a single `bytes=` range against the file size.
+
+    Returns None to serve the whole file (no header, or one we do not
+    understand, which RFC 9110 says to ignore) and raises 416 when the range
+    lies outside the file.
+    """
+    if not range_header:
+        return None
+    match = _RANGE_PATTERN.match(range_header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start = max(size - int(last), 0)
+        end = size - 1
+
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail=error_response(
+                "Requested range not satisfiable",
+                status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                {"size": size},
+            ),
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+def _iter_file(path: str, start: int, end: int) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def download_export_job(job_id: str, owner: str, range_header: Optional[str] = None):
+    """Serve a finished export, honouring `Range` so downloads can resume."""
+    job = _get_job(job_id, owner)
+    if job["status"] != "Completed":
+        raise CustomHTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            message="Export is not ready yet",
+            details={"status": job["status"]},
+        )
+
+    export_format = job.get("format", "csv")
+    path = _job_path(job_id, export_format)
+    if not os.path.exists(path):
+        raise CustomHTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, message="Export file has expired"
+        )
+
+    size = os.path.getsize(path)
+    byte_range = _parse_range(range_header, size)
+    start, end = byte_range or (0, size - 1)
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Length": str(end - start + 1),
+        "Content-Disposition": f"attachment; filename={job['filename']}",
+        # An explicit encoding keeps GZipMiddleware from re-encoding byte ranges
+        "Content-Encoding": "identity",
+    }
+    status_code = status.HTTP_200_OK
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+
+    return StreamingResponse(
+        _iter_file(path, start, end),
+        status_code=status_code,
+        media_type=EXPORT_FORMATS[export_format][0],
+        headers=headers,
+    )
@@ -0,0 +1,237 @@
+from datetime import date, datetime
+from typing import Optional
+from sqlalchemy import and_, asc, cast, desc, func, literal, or_, select, union_all
+from sqlalchemy.orm import Session, aliased
+from app.models.transfer import Transfer
+from app.models.deposit import Deposit
+from app.models.user import User
+from app.models.withdrawal import Withdrawal
+from app.schemas.transactions_schema import TransactionResponse
+from app.core.schemas import CursorPaginatedResponse
+from app.core.pagination import encode_cursor, decode_cursor
+from app.core.exceptions import CustomHTTPException
+from fastapi import status
+
+TRANSACTION_TYPES = ["Deposit", "Transfer", "Withdrawal"]
+
+
+def _branch_columns(transaction_type: str):
+    """Source model and the columns used to project it into the unified feed."""
+    if transaction_type == "Deposit":
+        return Deposit, Deposit.DepositID, Deposit.UserID
+    if transaction_type == "Transfer":
+        return Transfer, Transfer.TransferID, Transfer.SenderID
+    return Withdrawal, Withdrawal.WithdrawalID, Withdrawal.UserID
+
+
+def _seek_predicate(transaction_type, created_at, id_column, cursor, descending):
+    """
+    Keyset predicate on (CreatedAt, TransactionType, TransactionID) for one branch.
+
+    TransactionType is a constant inside a branch, so the row-value comparison
+    collapses into a plain range on CreatedAt (plus the ID tiebreak for the
+    cursor's own type), which keeps the predicate index-friendly.
+    """
+    cursor_created = cast(
+        cursor["c"], created_at.type
+    )  # Bind with the column type so DATETIME rounding matches
+    cursor_type = cursor["t"]
+    cursor_id = cursor["i"]
+
+    if descending:
+        if transaction_type < cursor_type:
+            return created_at <= cursor_created
+        if transaction_type > cursor_type:
+            return created_at < cursor_created
+        return or_(
+            created_at < cursor_created,
+            and_(created_at == cursor_created, id_column < cursor_id),
+        )
+
+    if transaction_type > cursor_type:
+        return created_at >= cursor_created
+    if transaction_type < cursor_type:
+        return created_at > cursor_created
+    return or_(
+        created_at > cursor_created,
+        and_(created_at == cursor_created, id_column > cursor_id),
+    )
+
+
+def build_feed_branch(
+    transaction_type: str,
+    user_id: Optional[int] = None,
+    transaction_status: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+):
+    """One UNION branch of the feed with every filter pushed into it."""
+    model, id_column, owner_column = _branch_columns(transaction_type)
+    Owner = aliased(User)
+
+    if transaction_type == "Transfer":
+        Receiver = aliased(User)
+        query = (
+            select(
+                id_column.label("TransactionID"),
+                owner_column.label("UserID"),
+                Owner.Username.label("Username"),
+                model.Amount.label("Amount"),
+                literal("Transfer").label("TransactionType"),
+                model.Status.label("Status"),
+                model.Description.label("Description"),
+                model.CreatedAt.label("CreatedAt"),
+                model.CreatedAt.label("UpdatedAt"),
+                Transfer.ReceiverID.label("ReceiverID"),
+                Receiver.Username.label("ReceiverUsername"),
+            )
+            .select_from(model)
+            .join(Owner, Owner.UserID == owner_column)
+            .join(Receiver, Receiver.UserID == Transfer.ReceiverID)
+        )
+        if user_id:
+            query = query.where(
+                or_(Transfer.SenderID == user_id, Transfer.ReceiverID == user_id)
+            )
+    else:
+        query = (
+            select(
+                id_column.label("TransactionID"),
+                owner_column.label("UserID"),
+                Owner.Username.label("Username"),
+                model.Amount.label("Amount"),
+                literal(transaction_type).label("TransactionType"),
+                model.Status.label("Status"),
+                model.Description.label("Description"),
+                model.CreatedAt.label("CreatedAt"),
+                model.CreatedAt.label("UpdatedAt"),
+                literal(None).label("ReceiverID"),
+                literal(None).label("ReceiverUsername"),
+            )
+            .select_from(model)
+            .join(Owner, Owner.UserID == owner_column)
+        )
+        if user_id:
+            query = query.where(owner_column == user_id)
+
+    if transaction_status:
+        query = query.where(model.Status == transaction_status)
+    if start_date:
+        query = query.where(model.CreatedAt >= start_date)
+    if end_date:
+        query = query.where(model.CreatedAt <= end_date)
+    return query, model.CreatedAt, id_column
+
+
+def get_transaction_feed_page(
+    db: Session,
+    user_id: Optional[int] = None,
+    per_page: int = 10,
+    cursor: Optional[str] = None,
+    transaction_type: Optional[str] = None,
+    transaction_status: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    order: Optional[str] = "desc",
+    include_total: bool = False,
+):
+    """
+    Keyset-paginated transaction feed.
+
+    Each branch seeks past the cursor and keeps only its own top per_page + 1
+    rows before the UNION ALL, so the cost of a page does not depend on how
+    deep into the history it is. The total count is skipped unless requested.
+    """
+    if transaction_type and transaction_type not in TRANSACTION_TYPES:
+        raise CustomHTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, message="Invalid transaction type"
+        )
+
+    descending = (order or "desc").lower() == "desc"
+    seek = decode_cursor(cursor)
+    if seek:
+        try:
+            seek = {
+                "c": datetime.fromisoformat(seek["c"]),
+                "t": str(seek["t"]),
+                "i": int(seek["i"]),
+            }
+        except (KeyError, TypeError, ValueError):
+            raise CustomHTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                message="Invalid pagination cursor",
+            )
+
+    types = [transaction_type] if transaction_type else TRANSACTION_TYPES
+    order_func = desc if descending else asc
+    fetch = per_page + 1
+
+    branches = []
+    count_branches = []
+    for branch_type in types:
+        query, created_at, id_column = build_feed_branch(
+            branch_type, user_id, transaction_status, start_date, end_date
+        )
+        if include_total:
+            count_branches.append(query.with_only_columns(id_column))
+        if seek:
+            query = query.where(
+                _seek_predicate(branch_type, created_at, id_column, seek, descending)
+            )
+        query = query.order_by(order_func(created_at), order_func(id_column)).limit(
+            fetch
+        )
+        branches.append(select(query.subquery()))
+
+    feed = union_all(*branches).subquery()
+    rows = db.execute(
+        select(feed)
+        .order_by(
+            order_func(feed.c.CreatedAt),
+            order_func(feed.c.TransactionType),
+            order_func(feed.c.TransactionID),
+        )
+        .limit(fetch)
+    ).all()
+
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            {"c": last.CreatedAt, "t": last.TransactionType, "i": last.TransactionID}
+        )
+
+    total_items = None
+    if include_total:
+        total_items = db.execute(
+            select(func.count()).select_from(union_all(*count_branches).subquery())
+        ).scalar()
+
+    return CursorPaginatedResponse(
+        success=True,
+        message="Transactions retrieved successfully",
+        data={
+            "items": [
+                TransactionResponse(
+                    TransactionID=t.TransactionID,
+                    UserID=t.UserID,
+                    Username=t.Username,
+                    Amount=float(t.Amount),
+                    TransactionType=t.TransactionType,
+                    Status=t.Status,
+                    Description=t.Description,
+                    CreatedAt=t.CreatedAt,
+                    UpdatedAt=t.UpdatedAt,
+                    ReceiverID=t.ReceiverID,
+                    ReceiverUsername=t.ReceiverUsername,
+                ).model_dump()
+                for t in rows
+            ]
+        },
+        per_page=per_page,
+        next_cursor=next_cursor,
+        has_more=has_more,
+        total_items=total_items,
+    )
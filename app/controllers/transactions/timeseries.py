@@ -0,0 +1,183 @@
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from dateutil.relativedelta import relativedelta
+from fastapi import status
+from sqlalchemy import func, literal, literal_column, select, union_all
+from sqlalchemy.orm import Session
+from app.core.exceptions import CustomHTTPException
+from app.core.rate_limiter import CACHE_TTL_LONG, get_redis_client
+from app.core.responses import success_response
+from app.models.deposit import Deposit
+from app.models.transfer import Transfer
+from app.models.withdrawal import Withdrawal
+
+TIMESERIES_BUCKETS = ("hour", "day", "month")
+TIMESERIES_MAX_BUCKETS = int(os.getenv("TIMESERIES_MAX_BUCKETS", "1000"))
+TIMESERIES_CLOSE_GRACE = int(
+    os.getenv("TIMESERIES_CLOSE_GRACE", "300")
+)  # Seconds a bucket stays open after it ends, for late commits
+TIMESERIES_CLOSED_TTL = int(
+    os.getenv("TIMESERIES_CLOSED_TTL", str(CACHE_TTL_LONG))
+)  # Seconds a closed bucket stays cached
+
+# Span returned when `from` is omitted
+_DEFAULT_SPANS = {
+    "hour": relativedelta(hours=24),
+    "day": relativedelta(days=30),
+    "month": relativedelta(months=12),
+}
+_STEPS = {
+    "hour": relativedelta(hours=1),
+    "day": relativedelta(days=1),
+    "month": relativedelta(months=1),
+}
+_SERIES_KEYS = {
+    "Deposit": "deposits",
+    "Transfer": "transfers",
+    "Withdrawal": "withdrawals",
+}
+
+
+def _utc(value: datetime) -> datetime:
+    """Naive UTC, as CreatedAt is stored; naive input is taken to be UTC."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _truncate(value: datetime, bucket: str) -> datetime:
+    value = value.replace(minute=0, second=0, microsecond=0, tzinfo=None)
+    if bucket in ("day", "month"):
+        value = value.replace(hour=0)
+    if bucket == "month":
+        value = value.replace(day=1)
+    return value
+
+
+def _bucket_column(column, bucket: str):
+    # DATEADD(unit, DATEDIFF(unit, 0, col), 0) floors to the unit on any SQL Server
+    unit = literal_column(bucket)
+    return func.dateadd(unit, func.datediff(unit, 0, column), 0)
+
+
+def _empty_totals() -> Dict[str, Dict[str, float]]:
+    return {key: {"count": 0, "amount": 0.0} for key in _SERIES_KEYS.values()}
+
+
+def _cache_key(bucket: str, period: datetime) -> str:
+    # "utc" retires the keys written while buckets mixed time zones
+    return f"analytics:timeseries:utc:{bucket}:{period.isoformat()}"
+
+
+def _query_buckets(
+    db: Session, bucket: str, start: datetime, end: datetime
+) -> Dict[datetime, Dict]:
+    """Completed counts and volumes per bucket and type in one GROUP BY."""
+    legs = union_all(
+        *[
+            select(
+                _bucket_column(model.CreatedAt, bucket).label("Period"),
+                literal(transaction_type).label("TransactionType"),
+                model.Amount.label("Amount"),
+            ).where(
+                model.Status == "Completed",
+                model.CreatedAt >= start,
+                model.CreatedAt < end,
+            )
+            for model, transaction_type in [
+                (Deposit, "Deposit"),
+                (Transfer, "Transfer"),
+                (Withdrawal, "Withdrawal"),
+            ]
+        ]
+    ).subquery()
+    rows = db.execute(
+        select(
+            legs.c.Period,
+            legs.c.TransactionType,
+            func.count().label("TxCount"),
+            func.sum(legs.c.Amount).label("TxAmount"),
+        ).group_by(legs.c.Period, legs.c.TransactionType)
+    )
+
+    buckets: Dict[datetime, Dict] = {}
+    for row in rows:
+        totals = buckets.setdefault(_truncate(row.Period, bucket), _empty_totals())
+        totals[_SERIES_KEYS[row.TransactionType]] = {
+            "count": row.TxCount,
+            "amount": float(row.TxAmount or 0),
+        }
+    return buckets
+
+
+def get_analytics_timeseries(
+    db: Session,
+    bucket: str = "day",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
+    """
+    Completed transaction counts and volumes per hour, day or month.
+
+    Buckets are in UTC, the zone CreatedAt is stored in; `start` and `end`
+    with an offset are converted to it. Every bucket is cached on its own. A
+    bucket that ended more than TIMESERIES_CLOSE_GRACE seconds ago can no
+    longer change, so it is cached for TIMESERIES_CLOSED_TTL seconds; only
+    the missing buckets and the open one are computed, with a single
+    GROUP BY over their combined range.
+    """
+    if bucket not in TIMESERIES_BUCKETS:
+        raise CustomHTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            message="Invalid bucket",
+            details={"allowed": list(TIMESERIES_BUCKETS)},
+        )
+
+    now = _utc(datetime.now(timezone.utc))
+    end = _utc(end) if end else now
+    start = _utc(start) if start else end - _DEFAULT_SPANS[bucket]
+    if start >= end:
+        raise CustomHTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            message="'from' must be earlier than 'to'",
+        )
+
+    periods: List[datetime] = []
+    period = _truncate(start, bucket)
+    while period < end:
+        periods.append(period)
+        if len(periods) > TIMESERIES_MAX_BUCKETS:
+            raise CustomHTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                message=f"Range spans more than {TIMESERIES_MAX_BUCKETS} buckets",
+            )
+        period += _STEPS[bucket]
+
+    redis = get_redis_client()
+    cached = redis.mget([_cache_key(bucket, p) for p in periods])
+    series = {p: json.loads(c) for p, c in zip(periods, cached) if c is not None}
+
+    missing = [p for p in periods if p not in series]
+    if missing:
+        computed = _query_buckets(db, bucket, missing[0], missing[-1] + _STEPS[bucket])
+        closed_before = now - timedelta(seconds=TIMESERIES_CLOSE_GRACE)
+        pipe = redis.pipeline()
+        for p in missing:
+            series[p] = computed.get(p, _empty_totals())
+            if p + _STEPS[bucket] <= closed_before:
+                pipe.setex(
+                    _cache_key(bucket, p), TIMESERIES_CLOSED_TTL, json.dumps(series[p])
+                )
+        pipe.execute()
+
+    return success_response(
+        message="Analytics timeseries retrieved successfully",
+        data={
+            "bucket": bucket,
+            "from": periods[0].isoformat(),
+            "to": end.isoformat(),
+            "series": [{"period": p.isoformat(), **series[p]} for p in periods],
+        },
+    )
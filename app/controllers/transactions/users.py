@@ -6,10 +6,14 @@ from app.models.transfer import Transfer
 from app.models.deposit import Deposit
 from app.models.user import User
 from app.models.withdrawal import Withdrawal
+from app.models.ledger import LedgerEntry
 
 from app.schemas.transactions_schema import TransactionResponse
-from app.core.schemas import PaginatedResponse
+from app.schemas.ledger_schema import LedgerEntryResponse
+from app.core.schemas import CursorPaginatedResponse, PaginatedResponse
+from app.core.pagination import encode_cursor, decode_cursor
 from app.core.exceptions import CustomHTTPException
+from app.controllers.transactions.feed import get_transaction_feed_page
 from fastapi import status
 from datetime import date
 from typing import Optional
@@ -26,6 +30,8 @@ def get_user_transactions(
     end_date: Optional[date] = None,
     sort_by: Optional[str] = "CreatedAt",
     order: Optional[str] = "desc",
+    cursor: Optional[str] = None,
+    include_total: bool = False,
 ):
     # Validate inputs
     if transaction_type and transaction_type not in [
@@ -46,6 +52,21 @@ def get_user_transactions(
             message="Invalid transaction status",
         )
 
+    # Keyset pagination: ordered by (CreatedAt, TransactionType, TransactionID)
+    if cursor is not None:
+        return get_transaction_feed_page(
+            db,
+            user_id=user_id,
+            per_page=per_page,
+            cursor=cursor,
+            transaction_type=transaction_type,
+            transaction_status=transaction_status,
+            start_date=start_date,
+            end_date=end_date,
+            order=order,
+            include_total=include_total,
+        )
+
     # Alias for Receiver User table
     Receiver = aliased(User)
 
@@ -165,3 +186,38 @@ def get_user_transactions(
         total_items=total_items,
         total_pages=(total_items + per_page - 1) // per_page,
     )
+
+
+def get_user_ledger(
+    user_id: int,
+    db: Session,
+    per_page: int = 10,
+    cursor: Optional[str] = None,
+):
+    # Newest first; the per-account Sequence is the keyset
+    query = db.query(LedgerEntry).filter(LedgerEntry.UserID == user_id)
+    seek = decode_cursor(cursor)
+    if seek:
+        try:
+            query = query.filter(LedgerEntry.Sequence < int(seek["s"]))
+        except (KeyError, TypeError, ValueError):
+            raise CustomHTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                message="Invalid pagination cursor",
+            )
+    entries = query.order_by(desc(LedgerEntry.Sequence)).limit(per_page + 1).all()
+
+    has_more = len(entries) > per_page
+    entries = entries[:per_page]
+    return CursorPaginatedResponse(
+        success=True,
+        message="Ledger entries retrieved successfully",
+        data={
+            "items": [
+                LedgerEntryResponse.model_validate(e).model_dump() for e in entries
+            ]
+        },
+        per_page=per_page,
+        next_cursor=encode_cursor({"s": entries[-1].Sequence}) if has_more else None,
+        has_more=has_more,
+    )
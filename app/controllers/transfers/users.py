@@ -1,44 +1,71 @@
 from datetime import datetime, timezone
 from fastapi import status, BackgroundTasks
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.transfer import Transfer
 from app.models.user import User
 from app.schemas.transfer_schema import TransferCreate, TransferResponse
 from app.core.responses import success_response
 from app.core.exceptions import CustomHTTPException
+from app.core.idempotency import record_response
 from app.core.event_emitter import emit_event
+from app.core.ledger import post_ledger_entry
+from app.core.rollups import record_transaction_rollup
 import uuid
 
 
 async def create_transfer(
     sender_id: int,
     transfer: TransferCreate,
-    db: Session,
+    db: AsyncSession,
     background_tasks: BackgroundTasks,
 ):
+    if transfer.Amount <= 0:
+        raise CustomHTTPException(
+            status_code=400, message="Amount must be greater than zero"
+        )
+
     # Determine which identifier was provided and query accordingly
-    receiver = None
+    receiver_id = None
     if transfer.cnic:
-        receiver = db.query(User).filter(User.CNIC == transfer.cnic).first()
+        receiver_id = await db.scalar(
+            select(User.UserID).where(User.CNIC == transfer.cnic)
+        )
     elif transfer.username:
-        receiver = db.query(User).filter(User.Username == transfer.username).first()
+        receiver_id = await db.scalar(
+            select(User.UserID).where(User.Username == transfer.username)
+        )
     elif transfer.email:
-        receiver = db.query(User).filter(User.Email == transfer.email).first()
+        receiver_id = await db.scalar(
+            select(User.UserID).where(User.Email == transfer.email)
+        )
 
-    if not receiver:
+    if not receiver_id:
         raise CustomHTTPException(status_code=404, message="Receiver not found")
 
-    if receiver.UserID == sender_id:
+    if receiver_id == sender_id:
         raise CustomHTTPException(
             status_code=400, message="Cannot transfer to yourself"
         )
 
-    if not receiver.IsActive:
+    # Lock both accounts lowest UserID first, so opposing transfers between
+    # the same pair queue behind each other instead of deadlocking. Balances
+    # are checked and updated only under these locks.
+    accounts = {}
+    for user_id in sorted((sender_id, receiver_id)):
+        accounts[user_id] = await db.scalar(
+            select(User)
+            .where(User.UserID == user_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+    sender, receiver = accounts[sender_id], accounts[receiver_id]
+
+    if not receiver or not receiver.IsActive:
         raise CustomHTTPException(
             status_code=400, message="Receiver account is inactive"
         )
 
-    sender = db.query(User).filter(User.UserID == sender_id).first()
     if not sender or not sender.IsActive:
         raise CustomHTTPException(
             status_code=400, message="Sender account is invalid or inactive"
@@ -47,11 +74,6 @@ async def create_transfer(
     if sender.Balance < transfer.Amount:
         raise CustomHTTPException(status_code=400, message="Insufficient balance")
 
-    if transfer.Amount <= 0:
-        raise CustomHTTPException(
-            status_code=400, message="Amount must be greater than zero"
-        )
-
     new_transfer = Transfer(
         SenderID=sender_id,
         ReceiverID=receiver.UserID,
@@ -69,8 +91,52 @@ async def create_transfer(
         new_transfer.Status = "Completed"
 
         db.add(new_transfer)
-        db.commit()
-        db.refresh(new_transfer)
+        await db.flush()  # Assign TransferID for the ledger entries
+
+        # One leg per account: debit the sender, credit the receiver
+        await db.run_sync(
+            post_ledger_entry,
+            sender,
+            "Transfer",
+            new_transfer.TransferID,
+            -transfer.Amount,
+            counterparty_id=receiver.UserID,
+            reference_number=new_transfer.ReferenceNumber,
+            description=new_transfer.Description,
+        )
+        await db.run_sync(
+            post_ledger_entry,
+            receiver,
+            "Transfer",
+            new_transfer.TransferID,
+            transfer.Amount,
+            counterparty_id=sender_id,
+            reference_number=new_transfer.ReferenceNumber,
+            description=new_transfer.Description,
+        )
+        transfer_day = new_transfer.CreatedAt.date()
+        await db.run_sync(
+            record_transaction_rollup,
+            sender_id,
+            "TransferSent",
+            new_transfer.Status,
+            transfer.Amount,
+            transfer_day,
+        )
+        await db.run_sync(
+            record_transaction_rollup,
+            receiver.UserID,
+            "TransferReceived",
+            new_transfer.Status,
+            transfer.Amount,
+            transfer_day,
+        )
+        response = success_response(
+            message="Transfer completed successfully",
+            data=TransferResponse.model_validate(new_transfer).model_dump(),
+        )
+        record_response(db, response)  # Completes the Idempotency-Key, if any
+        await db.commit()
 
         # Emit notification to sender
         await emit_event(
@@ -102,14 +168,11 @@ async def create_transfer(
             background_tasks=background_tasks,
         )
 
-        return success_response(
-            message="Transfer completed successfully",
-            data=TransferResponse.model_validate(new_transfer).model_dump(),
-        )
+        return response
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         new_transfer.Status = "Failed"
-        db.commit()
+        await db.commit()
         raise CustomHTTPException(
             status_code=500,
             message="Transfer failed",
@@ -1,10 +1,7 @@
-from io import StringIO
-import csv
 import os
 from typing import Optional
-from fastapi.responses import StreamingResponse
 from fastapi import Depends, status
-from sqlalchemy.orm import Session, aliased
+from sqlalchemy.orm import Session
 from app.core.exceptions import CustomHTTPException, DatabaseError
 from app.core.rate_limiter import CACHE_TTL_SHORT, get_redis_client
 from app.schemas.user_schema import (
@@ -20,17 +17,28 @@ from app.schemas.user_schema import (
 from app.models.user import User
 from app.core.database import get_db
 from app.core.responses import success_response
-from app.core.utils import hash_password, check_unique_field, send_email
+from app.core.rollups import (
+    ROLLUP_BUCKETS,
+    loan_totals,
+    rollup_volume_series,
+    transaction_totals,
+)
+from app.core.utils import (
+    hash_password,
+    verify_password,
+    check_unique_field,
+    send_email,
+)
 from app.core.auth import create_access_token, create_refresh_token
-from passlib.context import CryptContext
-from datetime import datetime, timezone
-from sqlalchemy import case, func, or_
-from app.models.deposit import Deposit
-from app.models.transfer import Transfer
-from app.models.withdrawal import Withdrawal
-from app.models.loan import Loan
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from datetime import date, datetime, timezone
+from sqlalchemy import select, true
+from app.controllers.transactions.exports import (
+    build_export_statement,
+    export_filename,
+    stream_transactions_export,
+    validate_export_format,
+)
+from app.controllers.transactions.export_jobs import submit_export_job
 
 
 async def check_field_uniqueness(
@@ -132,7 +140,7 @@ def login_user(credentials: UserLogin, db: Session = Depends(get_db)):
         .first()
     )
 
-    if not user or not pwd_context.verify(credentials.Password, user.Password):
+    if not user or not verify_password(credentials.Password, user.Password):
         raise CustomHTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, message="Invalid credentials"
         )
@@ -220,14 +228,14 @@ def update_user_password(
         )
 
     # Verify current password
-    if not pwd_context.verify(password_update.CurrentPassword, user.Password):
+    if not verify_password(password_update.CurrentPassword, user.Password):
         raise CustomHTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             message="Current password is incorrect",
         )
 
     # Update password
-    user.Password = pwd_context.hash(password_update.NewPassword)
+    user.Password = hash_password(password_update.NewPassword)
 
     try:
         db.commit()
@@ -279,54 +287,29 @@ def get_user_profile(user_id: int, db: Session):
 
 
 def get_user_analytics_summary(user_id: int, db: Session):
-    # Total Transactions
-    deposit_count = (
-        db.query(Deposit)
-        .filter(Deposit.UserID == user_id, Deposit.Status == "Completed")
-        .count()
-    )
-    deposit_total = (
-        db.query(func.sum(Deposit.Amount))
-        .filter(Deposit.UserID == user_id, Deposit.Status == "Completed")
-        .scalar()
-        or 0
-    )
-
-    transfer_sent_count = (
-        db.query(Transfer)
-        .filter(Transfer.SenderID == user_id, Transfer.Status == "Completed")
-        .count()
-    )
-    transfer_sent_total = (
-        db.query(func.sum(Transfer.Amount))
-        .filter(Transfer.SenderID == user_id, Transfer.Status == "Completed")
-        .scalar()
-        or 0
-    )
-
-    transfer_received_count = (
-        db.query(Transfer)
-        .filter(Transfer.ReceiverID == user_id, Transfer.Status == "Completed")
-        .count()
-    )
-    transfer_received_total = (
-        db.query(func.sum(Transfer.Amount))
-        .filter(Transfer.ReceiverID == user_id, Transfer.Status == "Completed")
-        .scalar()
-        or 0
-    )
+    """
+    Dashboard totals for one user.
+
+    Transaction and loan totals are read from the user's rollup rows and the
+    balance from a scalar subquery, all in one round trip.
+    """
+    transactions = transaction_totals(user_id)
+    loans = loan_totals(user_id)
+    balance = select(User.Balance).where(User.UserID == user_id).scalar_subquery()
+    row = db.execute(
+        select(transactions, loans, balance.label("balance")).select_from(
+            transactions.join(loans, true())
+        )
+    ).one()
 
-    withdrawal_count = (
-        db.query(Withdrawal)
-        .filter(Withdrawal.UserID == user_id, Withdrawal.Status == "Completed")
-        .count()
-    )
-    withdrawal_total = (
-        db.query(func.sum(Withdrawal.Amount))
-        .filter(Withdrawal.UserID == user_id, Withdrawal.Status == "Completed")
-        .scalar()
-        or 0
-    )
+    deposit_count = row.deposit_count or 0
+    deposit_total = row.deposit_total or 0
+    transfer_sent_count = row.transfer_sent_count or 0
+    transfer_sent_total = row.transfer_sent_total or 0
+    transfer_received_count = row.transfer_received_count or 0
+    transfer_received_total = row.transfer_received_total or 0
+    withdrawal_count = row.withdrawal_count or 0
+    withdrawal_total = row.withdrawal_total or 0
 
     total_transaction_count = (
         deposit_count + transfer_sent_count + transfer_received_count + withdrawal_count
@@ -342,29 +325,13 @@ def get_user_analytics_summary(user_id: int, db: Session):
         else 0
     )
 
-    # Total Loan Amounts
-    total_loan_amount = (
-        db.query(func.sum(Loan.LoanAmount))
-        .filter(Loan.UserID == user_id, Loan.LoanStatus == "Approved")
-        .scalar()
-        or 0
-    )
-    total_loan_count = (
-        db.query(Loan)
-        .filter(Loan.UserID == user_id, Loan.LoanStatus == "Approved")
-        .count()
-    )
-
-    # Pending Loans
-    pending_loan_count = (
-        db.query(Loan)
-        .filter(Loan.UserID == user_id, Loan.LoanStatus == "Pending")
-        .count()
-    )
+    # Loans
+    total_loan_amount = row.approved_amount or 0
+    total_loan_count = row.approved_count or 0
+    pending_loan_count = row.pending_count or 0
 
     # Current Balance
-    user = db.query(User).filter(User.UserID == user_id).first()
-    current_balance = float(user.Balance) if user else 0
+    current_balance = float(row.balance) if row.balance is not None else 0
 
     return success_response(
         message="User analytics summary retrieved successfully",
@@ -400,6 +367,28 @@ def get_user_analytics_summary(user_id: int, db: Session):
     )
 
 
+def get_user_volume_series(
+    user_id: int,
+    db: Session,
+    bucket: str = "day",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+):
+    if bucket not in ROLLUP_BUCKETS:
+        raise CustomHTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            message="Invalid bucket",
+            details={"allowed": list(ROLLUP_BUCKETS)},
+        )
+    return success_response(
+        message="User transaction volume retrieved successfully",
+        data={
+            "bucket": bucket,
+            "series": rollup_volume_series(db, bucket, user_id, start_date, end_date),
+        },
+    )
+
+
 def export_user_transactions(
     user_id: int,
     db: Session,
@@ -407,141 +396,26 @@ def export_user_transactions(
     end_date: Optional[datetime] = None,
     transaction_status: Optional[str] = None,
     transaction_type: Optional[str] = None,
+    background: bool = False,
+    export_format: str = "csv",
 ):
-    # Alias for User and Receiver
-    UserAlias = aliased(User)
-    Receiver = aliased(User)
-
-    # Base query
-    query = (
-        db.query(
-            func.coalesce(
-                Deposit.DepositID, Transfer.TransferID, Withdrawal.WithdrawalID
-            ).label("TransactionID"),
-            UserAlias.Username.label("Username"),
-            func.coalesce(Deposit.Amount, Transfer.Amount, Withdrawal.Amount).label(
-                "Amount"
-            ),
-            func.coalesce(Deposit.Status, Transfer.Status, Withdrawal.Status).label(
-                "Status"
-            ),
-            func.coalesce(
-                Deposit.CreatedAt, Transfer.CreatedAt, Withdrawal.CreatedAt
-            ).label("CreatedAt"),
-            case(
-                (Deposit.DepositID.isnot(None), "Deposit"),
-                (Transfer.TransferID.isnot(None), "Transfer"),
-                (Withdrawal.WithdrawalID.isnot(None), "Withdrawal"),
-            ).label("TransactionType"),
-            Transfer.ReceiverID.label("ReceiverID"),
-        )
-        .select_from(UserAlias)
-        .outerjoin(Deposit, Deposit.UserID == UserAlias.UserID)
-        .outerjoin(
-            Transfer,
-            (Transfer.SenderID == UserAlias.UserID)
-            | (Transfer.ReceiverID == UserAlias.UserID),
-        )
-        .outerjoin(Withdrawal, Withdrawal.UserID == UserAlias.UserID)
-        .outerjoin(Receiver, Receiver.UserID == Transfer.ReceiverID)
-        .filter(
-            or_(
-                Deposit.UserID == user_id,
-                Transfer.SenderID == user_id,
-                Transfer.ReceiverID == user_id,
-                Withdrawal.UserID == user_id,
-            )
-        )
-    )
-
-    # Apply filters
-    if transaction_type:
-        if transaction_type not in ["Deposit", "Transfer", "Withdrawal"]:
-            raise CustomHTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                message="Invalid transaction type",
-            )
-        if transaction_type == "Deposit":
-            query = query.filter(Deposit.DepositID.isnot(None))
-        elif transaction_type == "Transfer":
-            query = query.filter(Transfer.TransferID.isnot(None))
-        elif transaction_type == "Withdrawal":
-            query = query.filter(Withdrawal.WithdrawalID.isnot(None))
-    if transaction_status:
-        if transaction_status not in ["Pending", "Completed", "Failed"]:
-            raise CustomHTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                message="Invalid transaction status value",
-            )
-        query = query.filter(
-            func.coalesce(Deposit.Status, Transfer.Status, Withdrawal.Status)
-            == transaction_status
-        )
-    if start_date:
-        query = query.filter(
-            func.coalesce(Deposit.CreatedAt, Transfer.CreatedAt, Withdrawal.CreatedAt)
-            >= start_date
-        )
-    if end_date:
-        query = query.filter(
-            func.coalesce(Deposit.CreatedAt, Transfer.CreatedAt, Withdrawal.CreatedAt)
-            <= end_date
-        )
-
-    # Execute query
-    transactions = query.all()
-
-    if not transactions:
-        raise CustomHTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            message="No transactions found for export",
-        )
-
-    # Create CSV in memory
-    output = StringIO()
-    writer = csv.writer(output, quoting=csv.QUOTE_MINIMAL)
-
-    # Write headers
-    headers = [
-        "TransactionID",
-        "Username",
-        "Amount",
-        "Status",
-        "CreatedAt",
-        "TransactionType",
-        "ReceiverUsername",
-    ]
-    writer.writerow(headers)
-
-    # Fetch receiver usernames for transfers
-    receiver_ids = {t.ReceiverID for t in transactions if t.ReceiverID}
-    receivers = (
-        db.query(User.UserID, User.Username).filter(User.UserID.in_(receiver_ids)).all()
-    )
-    receiver_map = {r.UserID: r.Username for r in receivers}
-
-    # Write rows
-    for t in transactions:
-        receiver_username = receiver_map.get(t.ReceiverID, "") if t.ReceiverID else ""
-        writer.writerow(
-            [
-                t.TransactionID,
-                t.Username,
-                f"{float(t.Amount):.2f}",
-                t.Status,
-                t.CreatedAt.strftime("%Y-%m-%d %H:%M:%S") if t.CreatedAt else "",
-                t.TransactionType,
-                receiver_username,
-            ]
-        )
-
-    # Prepare streaming response
-    output.seek(0)
-    filename = (
-        f"user_transactions_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    export_format = validate_export_format(export_format)
+    filename = export_filename(
+        "user_transactions_export",
+        datetime.now().strftime("%Y%m%d_%H%M%S"),
+        export_format,
     )
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    filters = {
+        "user_id": user_id,
+        "transaction_type": transaction_type,
+        "transaction_status": transaction_status,
+        "start_date": start_date,
+        "end_date": end_date,
+    }
+    if background:
+        return submit_export_job(f"user:{user_id}", filename, filters, export_format)
+
+    # Stream the result set straight from the cursor
+    return stream_transactions_export(
+        build_export_statement(**filters), filename, export_format
     )
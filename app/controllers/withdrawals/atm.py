@@ -1,6 +1,6 @@
-from datetime import date
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from datetime import date, datetime, timezone
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from decimal import Decimal
 from app.models.withdrawal import Withdrawal
 from app.models.card import Card
@@ -8,21 +8,21 @@ from app.models.user import User
 from app.schemas.withdrawal_schema import WithdrawalCreate, WithdrawalResponse
 from app.core.responses import success_response
 from app.core.exceptions import CustomHTTPException
-from app.core.auth import pwd_context
+from app.core.idempotency import record_response
+from app.core.hashing import verify_secret_async
 from fastapi import status
 import uuid
 from fastapi import BackgroundTasks
 from app.core.event_emitter import emit_event
+from app.core.ledger import post_ledger_entry
+from app.core.rollups import record_transaction_rollup
 
 
 async def create_withdrawal(
-    withdrawal: WithdrawalCreate, db: Session, background_tasks: BackgroundTasks
+    withdrawal: WithdrawalCreate, db: AsyncSession, background_tasks: BackgroundTasks
 ):
-    card = (
-        db.query(Card)
-        .filter(Card.CardNumber == withdrawal.CardNumber)
-        .with_for_update()
-        .first()
+    card = await db.scalar(
+        select(Card).where(Card.CardNumber == withdrawal.CardNumber).with_for_update()
     )
     if not card:
         raise CustomHTTPException(
@@ -37,12 +37,14 @@ async def create_withdrawal(
             status_code=status.HTTP_400_BAD_REQUEST, message="Card has expired"
         )
 
-    if not pwd_context.verify(withdrawal.Pin, card.Pin):
+    if not await verify_secret_async(withdrawal.Pin, card.Pin):
         raise CustomHTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, message="Invalid PIN"
         )
 
-    user = db.query(User).filter(User.UserID == card.UserID).with_for_update().first()
+    user = await db.scalar(
+        select(User).where(User.UserID == card.UserID).with_for_update()
+    )
     if not user:
         raise CustomHTTPException(
             status_code=status.HTTP_404_NOT_FOUND, message="User not found"
@@ -70,14 +72,37 @@ async def create_withdrawal(
         ReferenceNumber=str(uuid.uuid4()),
         Status="Pending",
         Description="ATM withdrawal",
+        CreatedAt=datetime.now(timezone.utc),  # UTC, like transfers
     )
 
     try:
         user.Balance -= amount
         new_withdrawal.Status = "Completed"
         db.add(new_withdrawal)
-        db.commit()
-        db.refresh(new_withdrawal)
+        await db.flush()  # Assign WithdrawalID for the ledger entry
+        await db.run_sync(
+            post_ledger_entry,
+            user,
+            "Withdrawal",
+            new_withdrawal.WithdrawalID,
+            -amount,
+            reference_number=new_withdrawal.ReferenceNumber,
+            description=new_withdrawal.Description,
+        )
+        await db.run_sync(
+            record_transaction_rollup,
+            user.UserID,
+            "Withdrawal",
+            new_withdrawal.Status,
+            amount,
+            new_withdrawal.CreatedAt.date(),
+        )
+        response = success_response(
+            message="Withdrawal completed successfully",
+            data=WithdrawalResponse.model_validate(new_withdrawal).model_dump(),
+        )
+        record_response(db, response)  # Completes the Idempotency-Key, if any
+        await db.commit()
 
         # Emit real-time notification
         await emit_event(
@@ -93,14 +118,11 @@ async def create_withdrawal(
             background_tasks=background_tasks,
         )
 
-        return success_response(
-            message="Withdrawal completed successfully",
-            data=WithdrawalResponse.model_validate(new_withdrawal).model_dump(),
-        )
+        return response
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         new_withdrawal.Status = "Failed"
-        db.commit()
+        await db.commit()
         raise CustomHTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             message="Withdrawal failed",
@@ -1,34 +1,39 @@
-from fastapi import Depends, status
+from dataclasses import asdict, dataclass
+from fastapi import Depends, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from redis.exceptions import RedisError
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.models.user import User
 from app.models.admin import Admin
 from datetime import datetime, timedelta, timezone
-from passlib.context import CryptContext
 from app.core.exceptions import CustomHTTPException
 from app.core.responses import success_response, error_response
 import os
 import uuid
+from typing import Callable, Optional, Type, Union
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 7))
+PRINCIPAL_CACHE_TTL = int(
+    os.getenv("PRINCIPAL_CACHE_TTL", "60")
+)  # Seconds an authenticated principal is reused across requests
 
 if not SECRET_KEY:
     raise ValueError("SECRET_KEY must be set in the .env file")
 
 user_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/users/login")
 admin_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/admins/login")
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 def create_access_token(data: dict):
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire, "role_id": data.get("role_id")})
+    now = datetime.now(timezone.utc)
+    expire = now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode.update({"exp": expire, "iat": now, "role_id": data.get("role_id")})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
@@ -41,9 +46,100 @@ def create_refresh_token(data: dict):
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def get_current_user(
-    token: str = Depends(user_oauth2_scheme), db: Session = Depends(get_db)
+@dataclass(frozen=True)
+class UserPrincipal:
+    """The authenticated user, reduced to the fields routes read."""
+
+    UserID: int
+    IsActive: bool
+
+
+@dataclass(frozen=True)
+class AdminPrincipal:
+    """The authenticated admin, reduced to the fields routes read."""
+
+    AdminID: int
+    RoleID: int
+
+
+def _principal_key(kind: str, subject, issued_at) -> str:
+    from app.core.rate_limiter import versioned_key
+
+    return versioned_key(
+        f"principal:{kind}:{subject}:{issued_at}", [f"principal:{kind}:{subject}"]
+    )
+
+
+def _load_principal(
+    kind: str,
+    payload: dict,
+    principal_class: Type[Union[UserPrincipal, AdminPrincipal]],
+    load: Callable[[], Optional[Union[UserPrincipal, AdminPrincipal]]],
 ):
+    """
+    Principal for a verified token payload, shared across requests for
+    PRINCIPAL_CACHE_TTL seconds under its (sub, iat) pair. Tokens without
+    `iat`, and any Redis failure, go straight to the database.
+    """
+    from app.core.rate_limiter import get_from_cache, set_to_cache
+
+    issued_at = payload.get("iat")
+    if issued_at is None:
+        return load()
+
+    try:
+        key = _principal_key(kind, payload["sub"], issued_at)
+        cached = get_from_cache(key)
+        if cached:
+            return principal_class(**cached)
+        principal = load()
+        if principal is not None:
+            set_to_cache(key, asdict(principal), PRINCIPAL_CACHE_TTL)
+        return principal
+    except RedisError:
+        return load()
+
+
+def invalidate_principal(kind: str, subject_id: int) -> None:
+    """Forget cached principals of a user or admin whose account changed."""
+    from app.core.rate_limiter import invalidate_cache
+
+    invalidate_cache(f"principal:{kind}:{subject_id}")
+
+
+def _request_memo(request: Request) -> dict:
+    # Principals already resolved during this request, keyed by token
+    memo = getattr(request.state, "principals", None)
+    if memo is None:
+        memo = request.state.principals = {}
+    return memo
+
+
+def verified_claims(request: Request, token: str) -> Optional[dict]:
+    """
+    Payload of `token` if its signature and expiry check out, else None.
+    Decoded at most once per request, and never touches the database.
+    """
+    memo = _request_memo(request)
+    if ("claims", token) not in memo:
+        try:
+            memo[("claims", token)] = jwt.decode(
+                token, SECRET_KEY, algorithms=[ALGORITHM]
+            )
+        except JWTError:
+            memo[("claims", token)] = None
+    return memo[("claims", token)]
+
+
+def get_current_user(
+    request: Request,
+    token: str = Depends(user_oauth2_scheme),
+    db: Session = Depends(get_db),
+) -> UserPrincipal:
+    memo = _request_memo(request)
+    if ("user", token) in memo:
+        return memo[("user", token)]
+
     credentials_exception = CustomHTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         message="Could not validate credentials",
@@ -55,52 +151,85 @@ def get_current_user(
             message=f"Invalid token type: expected string, got {type(token)}",
             details={"token": token},
         )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-        user_id = int(user_id)
-    except JWTError as e:
+    payload = verified_claims(request, token)
+    if payload is None:
         raise CustomHTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             message="Invalid or expired token",
-            details={"error": str(e)},
+            details={},
         )
+    user_id: str = payload.get("sub")
+    if user_id is None:
+        raise credentials_exception
+    try:
+        user_id = int(user_id)
     except ValueError:
         raise credentials_exception
 
-    user = db.query(User).filter(User.UserID == user_id).first()
+    def load():
+        row = (
+            db.query(User.UserID, User.IsActive).filter(User.UserID == user_id).first()
+        )
+        return UserPrincipal(row.UserID, row.IsActive) if row else None
+
+    user = _load_principal("user", payload, UserPrincipal, load)
     if user is None:
         raise credentials_exception
 
+    memo[("user", token)] = user
     return user
 
 
 def get_current_admin(
-    token: str = Depends(admin_oauth2_scheme), db: Session = Depends(get_db)
-):
+    request: Request,
+    token: str = Depends(admin_oauth2_scheme),
+    db: Session = Depends(get_db),
+) -> AdminPrincipal:
+    memo = _request_memo(request)
+    if ("admin", token) in memo:
+        return memo[("admin", token)]
+
     credentials_exception = CustomHTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         message="Could not validate credentials",
         details={},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        admin_id: str = payload.get("sub")
-        role_id: int = payload.get("role_id")
-        if admin_id is None or role_id is None:
-            raise credentials_exception
-    except JWTError:
+    payload = verified_claims(request, token)
+    if payload is None:
+        raise credentials_exception
+    admin_id: str = payload.get("sub")
+    role_id: int = payload.get("role_id")
+    if admin_id is None or role_id is None:
         raise credentials_exception
 
-    admin = db.query(Admin).filter(Admin.AdminID == int(admin_id)).first()
+    def load():
+        row = (
+            db.query(Admin.AdminID, Admin.RoleID)
+            .filter(Admin.AdminID == int(admin_id))
+            .first()
+        )
+        return AdminPrincipal(row.AdminID, row.RoleID) if row else None
+
+    admin = _load_principal("admin", payload, AdminPrincipal, load)
     if admin is None or admin.RoleID != role_id:
         raise credentials_exception
+
+    memo[("admin", token)] = admin
     return admin
 
 
-def refresh_token(refresh_token: str, db: Session, model, role: str, id_field: str):
+def refresh_token(
+    refresh_token: str,
+    db: Session,
+    model,
+    role: str,
+    id_field: str,
+    access_claims: Optional[Callable[[int, Session], dict]] = None,
+):
+    """
+    Issue a new token pair. `access_claims(role_id, db)` can add claims to the
+    access token only, e.g. the admin permission bitmask.
+    """
     try:
         payload = jwt.decode(refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
         entity_id: str = payload.get("sub")
@@ -123,7 +252,11 @@ def refresh_token(refresh_token: str, db: Session, model, role: str, id_field: s
             )
 
         new_access_token = create_access_token(
-            data={"sub": str(entity_id), "role_id": role_id}
+            data={
+                "sub": str(entity_id),
+                "role_id": role_id,
+                **(access_claims(role_id, db) if access_claims else {}),
+            }
         )
         new_refresh_token = create_refresh_token(
             data={"sub": str(entity_id), "role_id": role_id}
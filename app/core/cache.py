@@ -0,0 +1,353 @@
+"""
+Two-tier response cache: a bounded in-process LRU (L1) in front of Redis (L2).
+
+- L1 answers repeated lookups in the same worker without a Redis round trip.
+  Entries live at most CACHE_L1_TTL seconds and the least recently used are
+  evicted beyond CACHE_L1_MAX_ENTRIES.
+- Invalidation works on namespaces (see `invalidate`): their generation
+  counters live in Redis and are embedded in cache keys. Workers keep the
+  generations they have read and drop them when another worker announces an
+  invalidation on the INVALIDATION_CHANNEL pub/sub channel, so a key built
+  after an invalidation never finds an L1 or L2 entry from before it. If the
+  subscription is down, generations are read from Redis on every lookup.
+- `get_or_compute` lets one caller per key and worker compute a missing value
+  while concurrent callers wait for it (single-flight), and refreshes entries
+  shortly before they expire with a probability that grows as expiry nears
+  (XFetch), weighted by how long the value took to compute. A hot key is
+  therefore recomputed once, in the background of normal traffic, instead of
+  by every request that arrives just after it expired.
+
+Entries are kept serialized (see app.core.serialization), and
+`get_or_compute_raw` caches bytes as they are, so a hit on a pre-rendered
+response costs a dict lookup. In Redis each entry is a short binary header
+(format, codec, compute time, expiry) followed by the payload, compressed if
+it is large. A Redis failure while reading or writing an entry, or an entry
+this process cannot decode, is treated as a miss, and so is a lookup whose
+generations cannot be read. An invalidation that cannot reach Redis only
+clears this worker; elsewhere the entries expire with their TTL.
+"""
+
+import heapq
+import json
+import math
+import os
+import random
+import struct
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+from redis import Redis
+from redis.exceptions import RedisError
+from app.core import serialization
+
+CACHE_L1_MAX_ENTRIES = int(os.getenv("CACHE_L1_MAX_ENTRIES", "2048"))
+CACHE_L1_TTL = float(os.getenv("CACHE_L1_TTL", "30"))
+CACHE_XFETCH_BETA = float(
+    os.getenv("CACHE_XFETCH_BETA", "1.0")
+)  # > 1 refreshes earlier, 0 disables early refresh
+CACHE_SINGLE_FLIGHT_WAIT = float(os.getenv("CACHE_SINGLE_FLIGHT_WAIT", "10"))
+
+NAMESPACE_PREFIX = "cache:ns:"
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+# magic, format id, codec id, compute seconds, expiry (epoch seconds)
+_HEADER = struct.Struct("!2sBBdd")
+_MAGIC = b"C1"
+
+
+@dataclass
+class _Entry:
+    format_id: int  # serialization.RAW for bytes cached as they are
+    payload: bytes  # Serialized, uncompressed
+    expires_at: float  # Epoch seconds at which the Redis copy expires
+    delta: float  # Seconds the value took to compute; 0 if unknown
+    l1_until: float  # Epoch seconds after which the L1 copy is dropped
+
+    def value(self) -> Any:
+        # Decoded per hit so callers can never mutate the cached copy
+        return serialization.loads(self.format_id, self.payload)
+
+    def should_refresh(self, now: float) -> bool:
+        # XFetch: -log(rand) is exponential, so early refreshes cluster near expiry
+        jitter = self.delta * CACHE_XFETCH_BETA * -math.log(1.0 - random.random())
+        return now + jitter >= self.expires_at
+
+
+class TwoTierCache:
+    def __init__(self, redis_factory: Callable[[], Redis]):
+        # The client must not decode responses: entries are binary
+        self.redis_factory = redis_factory
+        self._lock = threading.Lock()
+        self._l1: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._flights: Dict[str, threading.Event] = {}
+        self._generations: Dict[str, Tuple[str, float]] = {}
+        self._invalidations = 0  # Bumped whenever local generations are dropped
+        self._listening = False
+        self._listener_pid: Optional[int] = None
+        # Delayed invalidations: a heap of (due second, namespace)
+        self._delayed: List[Tuple[int, str]] = []
+        self._delayed_keys: Set[Tuple[int, str]] = set()
+        self._delayed_ready = threading.Condition()
+        self._delayed_pid: Optional[int] = None
+
+    # <========== L1 ==========>
+    def _l1_get(self, key: str, now: float) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._l1.get(key)
+            if entry is None:
+                return None
+            if now >= entry.l1_until:
+                del self._l1[key]
+                return None
+            self._l1.move_to_end(key)
+            return entry
+
+    def _l1_put(self, key: str, entry: _Entry) -> None:
+        with self._lock:
+            self._l1[key] = entry
+            self._l1.move_to_end(key)
+            while len(self._l1) > CACHE_L1_MAX_ENTRIES:
+                self._l1.popitem(last=False)
+
+    # <========== L2 ==========>
+    def _l2_get(self, key: str, now: float) -> Optional[_Entry]:
+        try:
+            raw = self.redis_factory().get(key)
+        except RedisError:
+            return None
+        if raw is None or len(raw) < _HEADER.size or raw[:2] != _MAGIC:
+            return None
+        _, format_id, codec_id, delta, expires_at = _HEADER.unpack_from(raw)
+        if not serialization.readable(format_id, codec_id):
+            return None
+        try:
+            payload = serialization.decompress(codec_id, raw[_HEADER.size :])
+        except Exception:
+            # Truncated or corrupt; each codec raises its own error type
+            return None
+        entry = _Entry(
+            format_id, payload, expires_at, delta, min(expires_at, now + CACHE_L1_TTL)
+        )
+        self._l1_put(key, entry)
+        return entry
+
+    def _lookup(self, key: str) -> Optional[_Entry]:
+        now = time.time()
+        return self._l1_get(key, now) or self._l2_get(key, now)
+
+    def _store(
+        self, key: str, format_id: int, payload: bytes, ttl: int, delta: float
+    ) -> _Entry:
+        now = time.time()
+        expires_at = now + ttl
+        entry = _Entry(
+            format_id, payload, expires_at, delta, min(expires_at, now + CACHE_L1_TTL)
+        )
+        self._l1_put(key, entry)
+        codec_id, data = serialization.compress(payload)
+        try:
+            self.redis_factory().setex(
+                key,
+                ttl,
+                _HEADER.pack(_MAGIC, format_id, codec_id, delta, expires_at) + data,
+            )
+        except RedisError:
+            pass
+        return entry
+
+    # <========== Public API ==========>
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._lookup(key)
+        return entry.value() if entry else None
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        self._store(key, serialization.FORMAT_ID, serialization.dumps(value), ttl, 0.0)
+
+    def get_or_compute(self, key: str, ttl: int, compute: Callable[[], Any]) -> Any:
+        """
+        The cached value of `key`, computing and caching it for `ttl` seconds
+        when it is missing or due for an early refresh.
+        """
+        return self._get_or_compute(
+            key,
+            ttl,
+            lambda: (serialization.FORMAT_ID, serialization.dumps(compute())),
+        ).value()
+
+    def get_or_compute_raw(
+        self, key: str, ttl: int, compute: Callable[[], bytes]
+    ) -> bytes:
+        """Like `get_or_compute` for bytes, which are cached and returned as is."""
+        return self._get_or_compute(
+            key, ttl, lambda: (serialization.RAW, compute())
+        ).payload
+
+    def _get_or_compute(
+        self, key: str, ttl: int, compute: Callable[[], Tuple[int, bytes]]
+    ) -> _Entry:
+        entry = self._lookup(key)
+        if entry and not entry.should_refresh(time.time()):
+            return entry
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = threading.Event()
+
+        if not leader:
+            if entry:
+                # Someone is already refreshing it; the current value is fine
+                return entry
+            flight.wait(CACHE_SINGLE_FLIGHT_WAIT)
+            entry = self._lookup(key)
+            if entry:
+                return entry
+            # The leader failed or timed out; compute on our own
+            return self._compute(key, ttl, compute)
+
+        try:
+            return self._compute(key, ttl, compute)
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.set()
+
+    def _compute(
+        self, key: str, ttl: int, compute: Callable[[], Tuple[int, bytes]]
+    ) -> _Entry:
+        started = time.perf_counter()
+        format_id, payload = compute()
+        return self._store(key, format_id, payload, ttl, time.perf_counter() - started)
+
+    # <========== Namespaces ==========>
+    def generations(self, namespaces: Sequence[str]) -> List[str]:
+        """Current generation of each namespace, "0" if never invalidated."""
+        self._ensure_listener()
+        now = time.time()
+        with self._lock:
+            known = {
+                ns: self._generations[ns][0]
+                for ns in namespaces
+                if ns in self._generations and self._generations[ns][1] > now
+            }
+            invalidations = self._invalidations
+        missing = [ns for ns in namespaces if ns not in known]
+        if missing:
+            try:
+                values = self.redis_factory().mget(
+                    [f"{NAMESPACE_PREFIX}{ns}" for ns in missing]
+                )
+            except RedisError:
+                # Without the generations no entry can be trusted; a one-off
+                # generation gives a key nothing is cached under
+                known.update((ns, f"x{uuid.uuid4().hex}") for ns in missing)
+                return [known[ns] for ns in namespaces]
+            fetched = {ns: str(int(value or 0)) for ns, value in zip(missing, values)}
+            known.update(fetched)
+            with self._lock:
+                # Only trust what we read if no invalidation raced with it
+                if self._listening and invalidations == self._invalidations:
+                    for ns, generation in fetched.items():
+                        self._generations[ns] = (generation, now + CACHE_L1_TTL)
+        return [known[ns] for ns in namespaces]
+
+    def invalidate(self, namespaces: Sequence[str]) -> None:
+        """Bump the generations of `namespaces` and tell every worker."""
+        self._forget(namespaces)
+        pipe = self.redis_factory().pipeline(transaction=False)
+        for namespace in namespaces:
+            pipe.incr(f"{NAMESPACE_PREFIX}{namespace}")
+        pipe.publish(INVALIDATION_CHANNEL, json.dumps(list(namespaces)))
+        try:
+            pipe.execute()
+        except RedisError as e:
+            # Never fail the write that triggered this; other workers' entries
+            # live on until their TTL runs out
+            print(f"Failed to invalidate cache namespaces {namespaces}: {e}")
+
+    def invalidate_later(self, namespaces: Sequence[str], delay: float) -> None:
+        """
+        Invalidate `namespaces` again once `delay` seconds have passed. One
+        thread per process serves every delayed invalidation, and those of a
+        namespace due in the same second are merged into one.
+        """
+        due = math.ceil(time.monotonic() + delay)
+        with self._delayed_ready:
+            if self._delayed_pid != os.getpid():
+                # A forked child serves only its own invalidations
+                self._delayed_pid = os.getpid()
+                self._delayed.clear()
+                self._delayed_keys.clear()
+                threading.Thread(
+                    target=self._run_delayed, name="cache-delayed", daemon=True
+                ).start()
+            for namespace in namespaces:
+                if (due, namespace) not in self._delayed_keys:
+                    self._delayed_keys.add((due, namespace))
+                    heapq.heappush(self._delayed, (due, namespace))
+            self._delayed_ready.notify()
+
+    def _run_delayed(self) -> None:
+        while True:
+            with self._delayed_ready:
+                while not self._delayed or self._delayed[0][0] > time.monotonic():
+                    self._delayed_ready.wait(
+                        self._delayed[0][0] - time.monotonic()
+                        if self._delayed
+                        else None
+                    )
+                now = time.monotonic()
+                namespaces = []
+                while self._delayed and self._delayed[0][0] <= now:
+                    entry = heapq.heappop(self._delayed)
+                    self._delayed_keys.discard(entry)
+                    if entry[1] not in namespaces:
+                        namespaces.append(entry[1])
+            try:
+                self.invalidate(namespaces)
+            except Exception:
+                pass
+
+    def _forget(self, namespaces: Optional[Sequence[str]] = None) -> None:
+        with self._lock:
+            self._invalidations += 1
+            if namespaces is None:
+                self._generations.clear()
+            for namespace in namespaces or ():
+                self._generations.pop(namespace, None)
+
+    def _ensure_listener(self) -> None:
+        # One subscriber thread per process; a forked child starts its own
+        if self._listener_pid == os.getpid():
+            return
+        with self._lock:
+            if self._listener_pid == os.getpid():
+                return
+            self._listener_pid = os.getpid()
+            self._listening = False
+            self._generations.clear()
+        threading.Thread(
+            target=self._listen, name="cache-invalidation", daemon=True
+        ).start()
+
+    def _listen(self) -> None:
+        while True:
+            try:
+                pubsub = self.redis_factory().pubsub()
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                for message in pubsub.listen():
+                    if message["type"] == "subscribe":
+                        # From here on no invalidation can go unnoticed
+                        self._listening = True
+                    elif message["type"] == "message":
+                        self._forget(json.loads(message["data"]))
+            except Exception:
+                pass
+            # Messages may have been missed while disconnected
+            self._listening = False
+            self._forget()
+            time.sleep(1)
@@ -1,8 +1,21 @@
 import os
+import threading
+import time
+from typing import Optional
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from starlette.requests import HTTPConnection
+from sqlalchemy import Select, create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from app.core.pool import (
+    InstrumentedAsyncQueuePool,
+    InstrumentedQueuePool,
+    pool_settings,
+    pool_stats,
+)
 
 # Load environment variables
 load_dotenv()
@@ -11,22 +24,203 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL is not set in the .env file!")
 
+# Async drivers for the sync URLs we support; override with ASYNC_DATABASE_URL
+_ASYNC_DRIVERS = {"mssql": "aioodbc", "sqlite": "aiosqlite"}
+
+
+def _async_database_url() -> str:
+    if os.getenv("ASYNC_DATABASE_URL"):
+        return os.getenv("ASYNC_DATABASE_URL")
+    url = make_url(DATABASE_URL)
+    backend = url.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}")
+    return url.set(drivername=f"{backend}+{_ASYNC_DRIVERS[backend]}").render_as_string(
+        hide_password=False
+    )
+
+
+# Share of each worker's connection budget given to the async engine
+DB_ASYNC_POOL_SHARE = float(os.getenv("DB_ASYNC_POOL_SHARE", "0.25"))
+
 # Database connection with pooling
 engine = create_engine(
     DATABASE_URL,
-    pool_size=5,  # Max connections in pool
-    max_overflow=10,  # Extra connections if needed
-    pool_timeout=30,  # Wait time for a connection
-    pool_recycle=1800,  # Recycle connections every 30 minutes
+    poolclass=InstrumentedQueuePool,
+    **pool_settings(1 - DB_ASYNC_POOL_SHARE),
+)
+
+# Optional read replica for read-only routes, see RoutingSession
+REPLICA_DATABASE_URL = os.getenv("REPLICA_DATABASE_URL")
+REPLICA_MAX_LAG = float(os.getenv("REPLICA_MAX_LAG", "5"))  # Seconds
+REPLICA_CHECK_INTERVAL = float(os.getenv("REPLICA_CHECK_INTERVAL", "5"))
+# Run on the replica, returns its lag in seconds. The default reads the
+# Always On redo state; set it to empty for replicas without one.
+REPLICA_LAG_QUERY = os.getenv(
+    "REPLICA_LAG_QUERY",
+    "SELECT DATEDIFF(SECOND, last_commit_time, GETDATE()) "
+    "FROM sys.dm_hadr_database_replica_states "
+    "WHERE is_local = 1 AND database_id = DB_ID()",
+)
+
+replica_engine = (
+    create_engine(
+        REPLICA_DATABASE_URL,
+        poolclass=InstrumentedQueuePool,
+        **pool_settings(1 - DB_ASYNC_POOL_SHARE, prefix="DB_REPLICA"),
+    )
+    if REPLICA_DATABASE_URL
+    else None
+)
+_replica_check_lock = threading.Lock()
+_replica_state = (False, 0.0)  # (usable, monotonic time of the next check)
+
+
+def replica_is_usable() -> bool:
+    """
+    Whether the replica is reachable and within REPLICA_MAX_LAG seconds of the
+    primary. Checked at most every REPLICA_CHECK_INTERVAL seconds; while one
+    thread checks, the others keep using the previous answer.
+    """
+    global _replica_state
+    if replica_engine is None:
+        return False
+    usable, check_at = _replica_state
+    if time.monotonic() < check_at or not _replica_check_lock.acquire(False):
+        return usable
+    try:
+        with replica_engine.connect() as connection:
+            if REPLICA_LAG_QUERY:
+                lag = connection.execute(text(REPLICA_LAG_QUERY)).scalar()
+                usable = lag is not None and lag <= REPLICA_MAX_LAG
+            else:
+                connection.execute(text("SELECT 1"))
+                usable = True
+    except SQLAlchemyError:
+        usable = False
+    finally:
+        _replica_state = (usable, time.monotonic() + REPLICA_CHECK_INTERVAL)
+        _replica_check_lock.release()
+    return usable
+
+
+def replica_max_staleness() -> float:
+    """
+    How far behind the primary, in seconds, a read served by the replica can
+    be. Reads are routed only while the last measured lag was within
+    REPLICA_MAX_LAG, and the lag is measured again every REPLICA_CHECK_INTERVAL
+    seconds, so it can grow by at most that much before the next check.
+    Without a REPLICA_LAG_QUERY the lag is never measured and this is only
+    what REPLICA_MAX_LAG promises.
+    """
+    return REPLICA_MAX_LAG + REPLICA_CHECK_INTERVAL
+
+
+class RoutingSession(Session):
+    """
+    Session that can serve reads from the replica.
+
+    Only sessions flagged with `info["read_only"]` are routed, and only plain
+    SELECTs without FOR UPDATE, issued before the session has written
+    anything, while the replica is healthy. Everything else, including all
+    flushes, goes to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (
+            self.info.get("read_only")
+            and not self.info.get("wrote")
+            and not self._flushing
+            and isinstance(clause, Select)
+            and clause._for_update_arg is None
+            and replica_is_usable()
+        ):
+            return replica_engine
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_session_wrote(session, flush_context):
+    # Later reads must see this transaction's writes, which only the primary has
+    session.info["wrote"] = True
+
+
+SessionLocal = sessionmaker(
+    class_=RoutingSession, autocommit=False, autoflush=False, bind=engine
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine for the request path, created on first use so that processes
+# which never serve requests (export workers, CLI tools) need no async driver.
+# Objects stay loaded after commit: an expired attribute cannot lazy-load
+# outside of an awaited call.
+_async_engine: Optional[AsyncEngine] = None
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
 
+def get_request_db(connection: HTTPConnection) -> Session:
+    """
+    The session of the current request or websocket, created on first use.
+
+    The route dependency, the rate limiter and the request middleware all get
+    the same session. A session only checks out a connection when it runs its
+    first query, so a request that never touches the database, such as a
+    health check or a cache hit, never holds a pooled connection.
+    """
+    db = getattr(connection.state, "db", None)
+    if db is None:
+        db = connection.state.db = SessionLocal()
+    return db
+
+
 # Dependency to get the DB session
-def get_db():
-    db = SessionLocal()
+def get_db(connection: HTTPConnection):
+    db = get_request_db(connection)
+    try:
+        yield db
+    finally:
+        # Hand the connection back as soon as the route is done. The session
+        # stays usable and is closed again by the middleware after the response.
+        db.close()
+
+
+# Dependency for read-only routes: a session of their own, reading from the
+# replica. Authentication and permission checks keep the shared session, so
+# they always see the primary.
+def get_read_db():
+    db = SessionLocal(info={"read_only": True})
     try:
         yield db
     finally:
         db.close()
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            _async_database_url(),
+            poolclass=InstrumentedAsyncQueuePool,
+            **pool_settings(DB_ASYNC_POOL_SHARE, prefix="DB_ASYNC"),
+        )
+    return _async_engine
+
+
+async def dispose_async_engine() -> None:
+    """Close pooled async connections; their driver threads keep the process alive."""
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+
+
+def database_pool_stats() -> dict:
+    return pool_stats(
+        ("sync", engine), ("async", _async_engine), ("replica", replica_engine)
+    )
+
+
+# Dependency to get an async DB session
+async def get_async_db():
+    async with AsyncSessionLocal(bind=get_async_engine()) as db:
+        yield db
@@ -0,0 +1,85 @@
+"""
+Password and PIN hashing off the request path.
+
+bcrypt costs a few hundred milliseconds of CPU per call. Running it inline in
+an `async def` route stalls the event loop, and running it in Starlette's
+shared threadpool lets a burst of logins exhaust the threads every other sync
+route needs. Every hash and verify is therefore sent to a dedicated, bounded
+thread pool (bcrypt releases the GIL, so threads run in parallel). Async code
+awaits the result; sync routes, which already run in a worker thread, block on
+it through the sync wrappers.
+
+When more than HASH_MAX_QUEUE calls are waiting, new ones are rejected with a
+503 instead of piling up behind the pool.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, TypeVar
+from fastapi import status
+from passlib.context import CryptContext
+from app.core.exceptions import CustomHTTPException
+
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_MAX_QUEUE = int(os.getenv("HASH_MAX_QUEUE", "256"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="bcrypt")
+_lock = threading.Lock()
+_in_flight = 0  # Submitted and not yet finished, running or queued
+_rejected = 0
+
+T = TypeVar("T")
+
+
+def _submit(fn: Callable[..., T], *args) -> "Future[T]":
+    global _in_flight, _rejected
+    with _lock:
+        if _in_flight >= HASH_WORKERS + HASH_MAX_QUEUE:
+            _rejected += 1
+            raise CustomHTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                message="Server is busy, please retry shortly",
+            )
+        _in_flight += 1
+
+    def done(_):
+        global _in_flight
+        with _lock:
+            _in_flight -= 1
+
+    future = _executor.submit(fn, *args)
+    future.add_done_callback(done)
+    return future
+
+
+def hashing_stats() -> Dict[str, int]:
+    """Pool size, calls waiting for a worker and calls turned away so far."""
+    with _lock:
+        return {
+            "workers": HASH_WORKERS,
+            "in_flight": _in_flight,
+            "queue_depth": max(_in_flight - HASH_WORKERS, 0),
+            "rejected": _rejected,
+        }
+
+
+async def hash_secret_async(secret: str) -> str:
+    return await asyncio.wrap_future(_submit(pwd_context.hash, secret))
+
+
+async def verify_secret_async(secret: str, hashed: str) -> bool:
+    return await asyncio.wrap_future(_submit(pwd_context.verify, secret, hashed))
+
+
+def hash_secret(secret: str) -> str:
+    """Blocking variant for sync routes, which run in a worker thread."""
+    return _submit(pwd_context.hash, secret).result()
+
+
+def verify_secret(secret: str, hashed: str) -> bool:
+    """Blocking variant for sync routes, which run in a worker thread."""
+    return _submit(pwd_context.verify, secret, hashed).result()
@@ -0,0 +1,214 @@
+"""
+Idempotency-Key support for the money-movement routes.
+
+Clients that time out on a transfer, withdrawal or deposit retry it, and
+without a key every retry moves the money again. A route wrapped with
+`run_idempotent` remembers the response to the first successful request per
+key in the IdempotencyKeys table, with Redis as a read-through cache for fast
+replays:
+
+- A repeated key with the same body gets the stored response back without
+  the handler running.
+- A repeated key with a different body is rejected with a 422.
+- A duplicate that arrives while the first request is still running waits
+  for it on the database, then gets its result, or a 409 if the key is still
+  not completed.
+
+The key's row is inserted before the handler runs, in the transaction that
+moves the money, so its primary key is the lock: a duplicate's insert blocks
+until that transaction ends and fails once it has committed. The handler
+stores its response with `record_response` right before committing, so the
+money and the completed key are committed together or not at all. Failed
+requests roll the row back, so a retry after e.g. an insufficient balance
+error runs again.
+
+Keys and bodies are stored as HMACs, never in the clear, because the ATM
+request body carries the card PIN.
+"""
+
+import hashlib
+import hmac
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+from fastapi import status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from redis import Redis
+from redis.exceptions import RedisError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.auth import SECRET_KEY
+from app.core.exceptions import CustomHTTPException
+from app.core.rate_limiter import get_redis_client
+from app.models.idempotency import IdempotencyRecord
+
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", "86400"))  # Replay window
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+# Session.info key of the row the running handler has to complete
+_PENDING_RECORD = "idempotency_record"
+
+
+def _digest(*parts: str) -> str:
+    return hmac.new(
+        SECRET_KEY.encode(), "\x1f".join(parts).encode(), hashlib.sha256
+    ).hexdigest()
+
+
+def _get_cached(redis: Redis, result_key: str) -> Optional[Dict[str, Any]]:
+    try:
+        cached = redis.get(result_key)
+    except RedisError:
+        return None
+    return json.loads(cached) if cached else None
+
+
+def _set_cached(redis: Redis, result_key: str, stored: Dict[str, Any], ttl: int):
+    try:
+        redis.set(result_key, json.dumps(stored), ex=max(ttl, 1))
+    except RedisError:
+        pass
+
+
+def _replay(stored: Dict[str, Any], request_hash: str) -> Dict[str, Any]:
+    if stored["request_hash"] != request_hash:
+        raise CustomHTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            message="Idempotency-Key was already used with a different request",
+        )
+    return stored["response"]
+
+
+def _replay_record(record: IdempotencyRecord, request_hash: str) -> Dict[str, Any]:
+    if record.RequestHash != request_hash:
+        raise CustomHTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            message="Idempotency-Key was already used with a different request",
+        )
+    if record.ResponseBody is None:
+        # Committed without a response by a handler that never recorded one,
+        # and not completed yet
+        raise _in_progress()
+    return json.loads(record.ResponseBody)
+
+
+def _in_progress() -> CustomHTTPException:
+    return CustomHTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        message="A request with this Idempotency-Key is still in progress",
+    )
+
+
+async def _load_record(
+    db: AsyncSession, redis: Redis, key_hash: str, result_key: str
+) -> Optional[IdempotencyRecord]:
+    """The live row for `key_hash`, cached in Redis if it is completed."""
+    record = await db.get(IdempotencyRecord, key_hash)
+    if record is None:
+        return None
+    remaining = (record.ExpiresAt - datetime.now()).total_seconds()
+    if remaining <= 0:
+        # The key may be reused once its window has passed
+        await db.delete(record)
+        await db.commit()
+        return None
+    if record.ResponseBody is not None:
+        await run_in_threadpool(
+            _set_cached, redis, result_key, _stored(record), int(remaining)
+        )
+    return record
+
+
+def _stored(record: IdempotencyRecord) -> Dict[str, Any]:
+    return {
+        "request_hash": record.RequestHash,
+        "response": json.loads(record.ResponseBody),
+    }
+
+
+def record_response(db: AsyncSession, response: Dict[str, Any]) -> None:
+    """
+    Complete the idempotency key `db` is running under, if any, with
+    `response`. Call it right before the commit that moves the money.
+    """
+    record = db.info.pop(_PENDING_RECORD, None)
+    if record is not None:
+        record.ResponseBody = json.dumps(jsonable_encoder(response))
+
+
+async def run_idempotent(
+    db: AsyncSession,
+    idempotency_key: Optional[str],
+    scope: str,
+    payload: Any,
+    handler: Callable[[], Awaitable[Dict[str, Any]]],
+) -> Dict[str, Any]:
+    """
+    Run `handler` at most once per `idempotency_key` within `scope`.
+
+    `scope` names the operation and its owner (e.g. "transfer:user:7") so
+    keys never collide across users or routes. `payload` is everything that
+    makes up the request; a replay must match it exactly. Without a key the
+    handler simply runs.
+    """
+    if idempotency_key is None:
+        return await handler()
+    if not 0 < len(idempotency_key) <= IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise CustomHTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            message=f"Idempotency-Key must be 1 to {IDEMPOTENCY_KEY_MAX_LENGTH} characters",
+        )
+
+    key_hash = _digest(scope, idempotency_key)
+    request_hash = _digest(json.dumps(jsonable_encoder(payload), sort_keys=True))
+    result_key = f"idempotency:{key_hash}"
+    redis = get_redis_client()
+
+    stored = await run_in_threadpool(_get_cached, redis, result_key)
+    if stored:
+        return _replay(stored, request_hash)
+
+    record = await _load_record(db, redis, key_hash, result_key)
+    if record is None:
+        record = IdempotencyRecord(
+            KeyHash=key_hash,
+            RequestHash=request_hash,
+            ExpiresAt=datetime.now() + timedelta(seconds=IDEMPOTENCY_TTL),
+        )
+        db.add(record)
+        try:
+            # Blocks while another request holds the key, fails once it committed
+            await db.flush()
+        except IntegrityError:
+            await db.rollback()
+            record = await _load_record(db, redis, key_hash, result_key)
+            if record is None:
+                raise _in_progress()
+            return _replay_record(record, request_hash)
+    else:
+        return _replay_record(record, request_hash)
+
+    db.info[_PENDING_RECORD] = record
+    try:
+        response = jsonable_encoder(await handler())
+    except BaseException:
+        # Drops the key with whatever the handler left uncommitted
+        await db.rollback()
+        raise
+    finally:
+        db.info.pop(_PENDING_RECORD, None)
+
+    if record.ResponseBody is None:
+        # The handler committed without completing the key; do it now
+        record.ResponseBody = json.dumps(response)
+        await db.commit()
+    await run_in_threadpool(
+        _set_cached,
+        redis,
+        result_key,
+        {"request_hash": request_hash, "response": response},
+        IDEMPOTENCY_TTL,
+    )
+    return response
@@ -0,0 +1,47 @@
+from decimal import Decimal
+from typing import Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models.ledger import LedgerEntry
+from app.models.user import User
+
+
+def post_ledger_entry(
+    db: Session,
+    user: User,
+    transaction_type: str,
+    transaction_id: int,
+    amount: Decimal,
+    counterparty_id: Optional[int] = None,
+    reference_number: Optional[str] = None,
+    description: Optional[str] = None,
+) -> LedgerEntry:
+    """
+    Append one signed leg to the account's ledger.
+
+    Must be called after the balance on `user` has been updated and inside the
+    same transaction as the source row, so the entry commits or rolls back with
+    it. Callers lock the Users row before reading the balance; the lock is
+    taken again here so no posting can read the last sequence number without
+    it, and concurrent postings for one account queue instead of colliding on
+    the unique (UserID, Sequence) constraint.
+    """
+    db.query(User.UserID).filter(User.UserID == user.UserID).with_for_update().one()
+    last_sequence = (
+        db.query(func.max(LedgerEntry.Sequence))
+        .filter(LedgerEntry.UserID == user.UserID)
+        .scalar()
+    )
+    entry = LedgerEntry(
+        UserID=user.UserID,
+        Sequence=(last_sequence or 0) + 1,
+        TransactionType=transaction_type,
+        TransactionID=transaction_id,
+        CounterpartyID=counterparty_id,
+        Amount=Decimal(str(amount)),
+        BalanceAfter=Decimal(str(user.Balance)),
+        ReferenceNumber=reference_number,
+        Description=description,
+    )
+    db.add(entry)
+    return entry
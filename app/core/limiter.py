@@ -0,0 +1,203 @@
+"""
+Rate limiting with one Redis round trip per request.
+
+Each limit is enforced with GCRA (the generic cell rate algorithm), a token
+bucket that stores a single timestamp per client and route: the theoretical
+arrival time (TAT) of the next request. A Lua script reads and advances it
+atomically, so a hit costs one EVALSHA instead of the several commands of a
+fixed or moving window. "100/hour" allows a burst of 100 requests and then one
+more every 36 seconds.
+
+A rejected client stays rejected until its TAT drains, and the TAT only ever
+moves forward, so the rejection time Redis reports is remembered in-process
+and further hits before it are refused without asking Redis again.
+
+The decorator mirrors slowapi's `@limiter.limit("10/minute")`: the endpoint
+must take a `request` argument. On success the X-RateLimit-* headers are left
+on `request.state.rate_limit_headers` for the response middleware; on
+rejection RateLimitExceeded carries them along with Retry-After.
+"""
+
+import functools
+import inspect
+import math
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple
+from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from redis import Redis
+from redis.exceptions import RedisError
+
+# KEYS[1] = bucket, ARGV[1] = emission interval (ms), ARGV[2] = burst size.
+# Returns {allowed, remaining, retry_after_ms, reset_after_ms}.
+_GCRA = """
+redis.replicate_commands()
+local interval = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = clock[1] * 1000 + math.floor(clock[2] / 1000)
+local tat = math.max(tonumber(redis.call('GET', KEYS[1])) or now, now)
+local new_tat = tat + interval
+local allow_at = new_tat - interval * burst
+if now < allow_at then
+    return {0, 0, allow_at - now, tat - now}
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', new_tat - now)
+return {1, math.floor((now - allow_at) / interval), 0, new_tat - now}
+"""
+
+_LIMIT_PATTERN = re.compile(
+    r"^\s*(\d+)\s*(?:/|per)\s*(\d+)?\s*(second|minute|hour|day)s?\s*$"
+)
+_UNIT_SECONDS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+_LOCAL_BLOCK_MAX = 10000  # Remembered rejections before expired ones are pruned
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    amount: int
+    period: int  # Seconds
+    text: str
+
+    @property
+    def interval_ms(self) -> int:
+        return max(self.period * 1000 // self.amount, 1)
+
+
+def parse_limits(value: str) -> List[RateLimit]:
+    """Parse "10/minute", "100 per hour" or several separated by ';' or ','."""
+    limits = []
+    for part in re.split(r"[;,]", value):
+        match = _LIMIT_PATTERN.match(part.lower())
+        if not match:
+            raise ValueError(f"Invalid rate limit: {part!r}")
+        amount, multiple, unit = match.groups()
+        limits.append(
+            RateLimit(
+                int(amount), int(multiple or 1) * _UNIT_SECONDS[unit], part.strip()
+            )
+        )
+    return limits
+
+
+class RateLimitExceeded(HTTPException):
+    def __init__(self, limit: RateLimit, retry_after: float, reset_after: float):
+        self.limit = limit
+        self.retry_after = max(math.ceil(retry_after), 1)
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail={
+                "success": False,
+                "message": "Too many requests. Please try again later.",
+                "data": {"retry_after": self.retry_after},
+            },
+            headers={
+                "Retry-After": str(self.retry_after),
+                **_limit_headers(limit, 0, reset_after),
+            },
+        )
+
+
+def _limit_headers(limit: RateLimit, remaining: int, reset_after: float) -> Dict:
+    return {
+        "X-RateLimit-Limit": str(limit.amount),
+        "X-RateLimit-Remaining": str(max(remaining, 0)),
+        "X-RateLimit-Reset": str(max(math.ceil(reset_after), 0)),
+    }
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        key_func: Callable[[Request], str],
+        redis_factory: Callable[[], Redis],
+        key_prefix: str = "ratelimit",
+        enabled: bool = True,
+    ):
+        self.key_func = key_func
+        self.redis_factory = redis_factory
+        self.key_prefix = key_prefix
+        self.enabled = enabled
+        self._script = None
+        self._blocked: Dict[str, Tuple[float, float]] = {}  # key -> (until, reset)
+        self._lock = threading.Lock()
+
+    def _gcra(self):
+        if self._script is None:
+            # Script objects run EVALSHA and reload the script if Redis lost it
+            self._script = self.redis_factory().register_script(_GCRA)
+        return self._script
+
+    def _check_local(self, key: str, limit: RateLimit) -> None:
+        blocked = self._blocked.get(key)
+        if blocked:
+            now = time.monotonic()
+            if now < blocked[0]:
+                raise RateLimitExceeded(limit, blocked[0] - now, blocked[1] - now)
+
+    def _block_locally(self, key: str, retry_after: float, reset_after: float):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._blocked) >= _LOCAL_BLOCK_MAX:
+                self._blocked = {k: v for k, v in self._blocked.items() if v[0] > now}
+            self._blocked[key] = (now + retry_after, now + reset_after)
+
+    def hit(self, request: Request, scope: str, limits: List[RateLimit]) -> None:
+        """
+        Count one request against every limit of `scope`, raising
+        RateLimitExceeded if any is exhausted. Redis errors let the request
+        through rather than failing it.
+        """
+        client = self.key_func(request)
+        tightest = None
+        for limit in limits:
+            key = f"{self.key_prefix}:{client}:{scope}:{limit.amount}/{limit.period}"
+            self._check_local(key, limit)
+            try:
+                allowed, remaining, retry_ms, reset_ms = self._gcra()(
+                    keys=[key], args=[limit.interval_ms, limit.amount]
+                )
+            except RedisError:
+                continue
+            if not allowed:
+                self._block_locally(key, retry_ms / 1000, reset_ms / 1000)
+                raise RateLimitExceeded(limit, retry_ms / 1000, reset_ms / 1000)
+            if tightest is None or remaining < tightest[1]:
+                tightest = (limit, remaining, reset_ms / 1000)
+        if tightest:
+            request.state.rate_limit_headers = _limit_headers(*tightest)
+
+    def limit(self, limit_value: str):
+        """Decorate a route so each client may call it `limit_value` times."""
+        limits = parse_limits(limit_value)
+
+        def decorator(func):
+            if "request" not in inspect.signature(func).parameters:
+                raise TypeError(f"{func.__name__} needs a `request` parameter")
+            scope = f"{func.__module__}.{func.__name__}"
+
+            if inspect.iscoroutinefunction(func):
+
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    if self.enabled:
+                        # EVALSHA is a blocking round trip; keep it off the loop
+                        await run_in_threadpool(
+                            self.hit, kwargs["request"], scope, limits
+                        )
+                    return await func(*args, **kwargs)
+
+                return async_wrapper
+
+            @functools.wraps(func)
+            def sync_wrapper(*args, **kwargs):
+                if self.enabled:
+                    self.hit(kwargs["request"], scope, limits)
+                return func(*args, **kwargs)
+
+            return sync_wrapper
+
+        return decorator
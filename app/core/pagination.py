@@ -0,0 +1,32 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional
+from fastapi import status
+from app.core.exceptions import CustomHTTPException
+
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """Encode the sort key of the last row on a page into an opaque cursor."""
+    payload = {
+        k: v.isoformat() if isinstance(v, datetime) else v for k, v in values.items()
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Decode a cursor produced by encode_cursor. Empty cursor means first page."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(payload, dict):
+            raise ValueError("cursor payload must be an object")
+        return payload
+    except (ValueError, TypeError):
+        raise CustomHTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            message="Invalid pagination cursor",
+        )
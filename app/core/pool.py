@@ -0,0 +1,129 @@
+"""
+Connection pool sizing and metrics.
+
+Every worker process owns its own pools, so the pool sizes are derived from
+a database-wide connection ceiling (DB_MAX_CONNECTIONS) divided by the number
+of workers (WORKERS), unless DB_POOL_SIZE / DB_MAX_OVERFLOW pin them.
+
+The pool classes below are QueuePool variants that count how long each
+checkout waited and how many gave up after DB_POOL_TIMEOUT, so pool
+exhaustion shows up in /health instead of only as slow requests.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Tuple
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Upper bounds, in seconds, of the checkout wait histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, float("inf"))
+
+
+def pool_settings(share: float = 1.0, prefix: str = "DB") -> Dict:
+    """
+    create_engine pool arguments for an engine given `share` of this worker's
+    connection budget: half kept open, half as overflow. `{prefix}_POOL_SIZE`
+    and `{prefix}_MAX_OVERFLOW` override the derived values.
+    """
+    # Read at call time: the engine is built after .env has been loaded
+    workers = int(os.getenv("WORKERS", "1"))
+    max_connections = int(os.getenv("DB_MAX_CONNECTIONS", "100"))
+    budget = max(int(max_connections / max(workers, 1) * share), 2)
+    pool_size = int(os.getenv(f"{prefix}_POOL_SIZE", str(max(budget // 2, 1))))
+    max_overflow = int(
+        os.getenv(f"{prefix}_MAX_OVERFLOW", str(max(budget - pool_size, 0)))
+    )
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "false").lower() == "true",
+        # LIFO reuses the hottest connections so idle ones can age out
+        "pool_use_lifo": os.getenv("DB_POOL_LIFO", "false").lower() == "true",
+    }
+
+
+class PoolMetrics:
+    """Checkout counters and a cumulative wait histogram for one pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_buckets = [0] * len(WAIT_BUCKETS)
+
+    def observe(self, waited: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += timed_out
+            self.wait_seconds_total += waited
+            for i, bound in enumerate(WAIT_BUCKETS):
+                if waited <= bound:
+                    self.wait_buckets[i] += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_histogram": {
+                    ("+Inf" if bound == float("inf") else str(bound)): count
+                    for bound, count in zip(WAIT_BUCKETS, self.wait_buckets)
+                },
+            }
+
+
+class _InstrumentedPoolMixin:
+    metrics: PoolMetrics
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self):
+        # dispose() swaps in a fresh pool; keep counting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.observe(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.observe(time.perf_counter() - start)
+        return connection
+
+    def stats(self) -> Dict:
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            **self.metrics.snapshot(),
+        }
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_stats(*named_engines: Tuple[str, object]) -> Dict[str, Dict]:
+    """Stats of each (name, engine) whose pool is instrumented."""
+    return {
+        name: engine.pool.stats()
+        for name, engine in named_engines
+        if engine is not None and hasattr(engine.pool, "stats")
+    }
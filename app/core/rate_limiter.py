@@ -1,19 +1,17 @@
-from datetime import date, datetime
-from decimal import Decimal
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
-from fastapi import Request, HTTPException
-from app.core.auth import get_current_user, get_current_admin
-from app.models.user import User
-from app.models.admin import Admin
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+from app.core.auth import verified_claims
+from app.core.cache import TwoTierCache
+from app.core.database import replica_engine, replica_max_staleness
+from app.core.limiter import RateLimiter, RateLimitExceeded
 import os
 from redis import Redis
-from typing import Optional, Any
-import json
+from pydantic import BaseModel
+from typing import Any, Callable, Optional, Sequence, Type
 
-# Singleton Redis client
+# Singleton Redis clients
 redis_client = None
+binary_redis_client = None
 
 # Load cache TTLs from environment with defaults
 CACHE_TTL_SHORT = int(
@@ -35,58 +33,83 @@ def get_redis_client() -> Redis:
     return redis_client
 
 
-# Custom key function for rate limiting
+def get_binary_redis_client() -> Redis:
+    """Client for values that are bytes, such as cache entries."""
+    global binary_redis_client
+    if binary_redis_client is None:
+        binary_redis_client = Redis.from_url(
+            os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        )
+    return binary_redis_client
+
+
+# Custom key function for rate limiting. Only the verified `sub` claim is
+# needed, so the key costs one JWT decode per request and no query.
 def get_rate_limit_key(request: Request) -> str:
     auth_header = request.headers.get("Authorization")
-    if request.url.path.startswith("/api/v1/users") and auth_header:
-        try:
-            token = auth_header.split("Bearer ")[1]
-            user: User = get_current_user(token, request.state.db)
-            return f"user:{user.UserID}"
-        except (IndexError, AttributeError, HTTPException):
-            pass
-    elif request.url.path.startswith("/api/v1/admins") and auth_header:
-        try:
-            token = auth_header.split("Bearer ")[1]
-            admin: Admin = get_current_admin(token, request.state.db)
-            return f"admin:{admin.AdminID}"
-        except (IndexError, AttributeError, HTTPException):
-            pass
-    return f"ip:{get_remote_address(request)}"
-
-
-limiter = Limiter(
+    if auth_header and auth_header.startswith("Bearer "):
+        token = auth_header[len("Bearer ") :]
+        for prefix, kind in (("/api/v1/users", "user"), ("/api/v1/admins", "admin")):
+            if request.url.path.startswith(prefix):
+                claims = verified_claims(request, token)
+                if claims and claims.get("sub") is not None:
+                    return f"{kind}:{claims['sub']}"
+                break
+    client_host = request.client.host if request.client else "127.0.0.1"
+    return f"ip:{client_host}"
+
+
+limiter = RateLimiter(
     key_func=get_rate_limit_key,
-    storage_uri=os.getenv("REDIS_URL", "redis://localhost:6379/0"),
-    default_limits=["100/hour"],
-    enabled=True,
+    redis_factory=get_redis_client,
+    enabled=os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true",
 )
 
 
 async def custom_rate_limit_handler(request: Request, exc: RateLimitExceeded):
-    key = get_rate_limit_key(request)
-    redis = get_redis_client()
-    ttl = redis.ttl(f"{key}:rate_limit") or 60
-    raise HTTPException(
-        status_code=429,
-        detail={
-            "success": False,
-            "message": "Too many requests. Please try again later.",
-            "data": {"retry_after": ttl},
-        },
-        headers={"Retry-After": str(ttl)},
+    # Retry-After and X-RateLimit-* were computed by the same script call
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={**exc.detail, "status_code": exc.status_code},
+        headers=exc.headers,
     )
 
 
-def get_limiter() -> Limiter:
+def get_limiter() -> RateLimiter:
     return limiter
 
 
 # Caching Utilities
+#
+# Cached entries are grouped into namespaces such as "users", "loans" or
+# "user:42", each with a generation counter in Redis. A cache key embeds the
+# current generation of every namespace it depends on, so invalidating a
+# namespace is a single INCR: later lookups build keys with the new generation
+# and the old entries are never read again and simply expire. Entries are kept
+# in-process as well as in Redis, see app.core.cache.
+
+
+response_cache = TwoTierCache(redis_factory=get_binary_redis_client)
+
+
+def versioned_key(base: str, namespaces: Sequence[str] = ()) -> str:
+    """`base` suffixed with the current generation of each namespace."""
+    if not namespaces:
+        return base
+    return f"{base}:v" + ".".join(response_cache.generations(namespaces))
+
+
 def get_cache_key(
-    request: Request, endpoint: str, user_id: Optional[int] = None, params: dict = None
+    request: Request,
+    endpoint: str,
+    user_id: Optional[int] = None,
+    params: dict = None,
+    namespaces: Sequence[str] = (),
 ) -> str:
-    """Generate a unique cache key based on endpoint, user, and query params."""
+    """
+    Generate a unique cache key based on endpoint, user, and query params,
+    tied to the generations of `namespaces`.
+    """
     base = f"{endpoint}"
     if user_id:
         base += f":user:{user_id}"
@@ -95,36 +118,45 @@ def get_cache_key(
             f"{k}={v}" for k, v in sorted(params.items()) if v is not None
         )
         base += f":{param_str}"
-    return base
+    return versioned_key(base, namespaces)
 
 
 def get_from_cache(key: str) -> Optional[Any]:
-    """Retrieve data from Redis cache."""
-    redis = get_redis_client()
-    cached = redis.get(key)
-    return json.loads(cached) if cached else None
-
-
-class DateTimeEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        if isinstance(obj, date):
-            return obj.isoformat()
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super().default(obj)
+    """Retrieve data from the in-process cache, else Redis."""
+    return response_cache.get(key)
 
 
 def set_to_cache(key: str, value: Any, ttl: int) -> None:
-    """Store data in Redis cache with specified TTL."""
-    redis = get_redis_client()
-    redis.setex(key, ttl, json.dumps(value, cls=DateTimeEncoder))
-
-
-def invalidate_cache(pattern: str) -> None:
-    """Invalidate cache keys matching a pattern (e.g., 'users:*')."""
-    redis = get_redis_client()
-    keys = redis.keys(f"{pattern}*")
-    if keys:
-        redis.delete(*keys)
+    """Store data in both cache tiers with specified TTL."""
+    response_cache.set(key, value, ttl)
+
+
+def cached_response(
+    key: str, ttl: int, compute: Callable[[], Any], response_model: Type[BaseModel]
+) -> Response:
+    """
+    The JSON response cached under `key`, else `compute()` rendered through
+    `response_model` and cached for `ttl` seconds. Hits are served as the
+    rendered bytes, skipping validation and serialization. Concurrent misses
+    in a worker share one computation, and hot entries are refreshed just
+    before they expire.
+    """
+    body = response_cache.get_or_compute_raw(
+        key,
+        ttl,
+        lambda: response_model.model_validate(compute()).model_dump_json().encode(),
+    )
+    return Response(content=body, media_type="application/json")
+
+
+def invalidate_cache(*namespaces: str) -> None:
+    """
+    Retire everything cached under `namespaces` (e.g. "users", "user:42") by
+    bumping their generations. O(1) per namespace, whatever the cache size.
+    """
+    response_cache.invalidate(namespaces)
+    if replica_engine is not None:
+        # A read served by the replica before it caught up with this write may
+        # cache what it had; retire such entries once no replica read can be
+        # that far behind
+        response_cache.invalidate_later(namespaces, replica_max_staleness())
@@ -1,31 +1,156 @@
+import json
+import os
+import time
+import uuid
+from typing import Dict, FrozenSet, Optional, Tuple
 from fastapi import Depends, status
+from jose import jwt
+from redis.exceptions import RedisError
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from app.core.exceptions import CustomHTTPException
-from app.core.auth import get_current_admin
+from app.core.auth import admin_oauth2_scheme, get_current_admin
 from app.core.database import get_db
+from app.core.rate_limiter import CACHE_TTL_MEDIUM, get_redis_client
 from app.models.admin import Admin
-from app.models.rbac import Role, RolePermission, Permission
+from app.models.rbac import RBAC_STATE_ID, RbacState, Role, RolePermission, Permission
 
+ROLE_PERMISSIONS_TTL = int(
+    os.getenv("ROLE_PERMISSIONS_TTL", "30")
+)  # Seconds another worker may act on an outdated RBAC version
 
-def check_permission(permission: str):
-    def permission_checker(
-        current_admin: Admin = Depends(get_current_admin), db: Session = Depends(get_db)
-    ):
-        # Fetch the role and its permissions
-        role_permissions = (
-            db.query(Permission.PermissionName)
-            .join(
-                RolePermission, RolePermission.PermissionID == Permission.PermissionID
-            )
-            .join(Role, Role.RoleID == RolePermission.RoleID)
-            .filter(Role.RoleID == current_admin.RoleID)
-            .all()
+# (global RBAC version, monotonic time it must be re-read)
+_rbac_version: Tuple[Optional[str], float] = (None, 0.0)
+# RoleID -> (RBAC version, permission names)
+_role_permissions: Dict[int, Tuple[str, FrozenSet[str]]] = {}
+# (RBAC version, PermissionName -> bit position)
+_permission_bits: Tuple[Optional[str], Dict[str, int]] = (None, {})
+
+
+def current_rbac_version(db: Session) -> Optional[str]:
+    """
+    The global RBAC version from the RbacState row, re-read at most every
+    ROLE_PERMISSIONS_TTL seconds. None while no version has been written, in
+    which case tokens carry no permissions and every check reads the database.
+    """
+    global _rbac_version
+    now = time.monotonic()
+    if _rbac_version[1] > now:
+        return _rbac_version[0]
+    version = (
+        db.query(RbacState.Version).filter(RbacState.StateID == RBAC_STATE_ID).scalar()
+    )
+    _rbac_version = (version, now + ROLE_PERMISSIONS_TTL)
+    return version
+
+
+def _load_role_permissions(role_id: int, db: Session) -> FrozenSet[str]:
+    permissions = (
+        db.query(Permission.PermissionName)
+        .join(RolePermission, RolePermission.PermissionID == Permission.PermissionID)
+        .filter(RolePermission.RoleID == role_id)
+        .all()
+    )
+    return frozenset(p.PermissionName for p in permissions)
+
+
+def get_role_permissions(role_id: int, db: Session) -> FrozenSet[str]:
+    """
+    Permission names granted to a role, cached in two tiers.
+
+    The in-process tier is used as long as its entry was built under the
+    current RBAC version, so it answers without any I/O. A miss is served from
+    the Redis tier (keyed by role and version) or, failing that, from the
+    database. If Redis is unreachable the database is used directly.
+    """
+    version = current_rbac_version(db)
+    if version is None:
+        return _load_role_permissions(role_id, db)
+
+    entry = _role_permissions.get(role_id)
+    if entry and entry[0] == version:
+        return entry[1]
+
+    key = f"rbac:role_permissions:{role_id}:v{version}"
+    try:
+        redis = get_redis_client()
+        cached = redis.get(key)
+        if cached is not None:
+            permissions = frozenset(json.loads(cached))
+        else:
+            permissions = _load_role_permissions(role_id, db)
+            redis.setex(key, CACHE_TTL_MEDIUM, json.dumps(sorted(permissions)))
+    except RedisError:
+        return _load_role_permissions(role_id, db)
+
+    _role_permissions[role_id] = (version, permissions)
+    return permissions
+
+
+def get_permission_bits(db: Session) -> Dict[str, int]:
+    """
+    Registry of permission name -> bit position in the token bitmask: the
+    permission's rank by PermissionID, so the mask stays as small as the
+    number of permissions. New permissions take the next bits; a rename or
+    delete moves bits and therefore bumps the RBAC version.
+    """
+    global _permission_bits
+    version = current_rbac_version(db)
+    if version is not None and _permission_bits[0] == version:
+        return _permission_bits[1]
+    bits = {
+        name: position
+        for position, (name,) in enumerate(
+            db.query(Permission.PermissionName).order_by(Permission.PermissionID)
         )
+    }
+    if version is not None:
+        _permission_bits = (version, bits)
+    return bits
+
 
-        # Extract permission names as a list
-        permissions = [rp.PermissionName for rp in role_permissions]
+def permission_claims(role_id: int, db: Session) -> dict:
+    """
+    Access-token claims that let `check_permission` authorize with a bit test:
+    the role's permissions as a hex bitmask and the RBAC version it reflects.
+    Empty when the version is unknown, so the token falls back to lookups.
+    """
+    version = current_rbac_version(db)
+    if version is None:
+        return {}
+    bits = get_permission_bits(db)
+    mask = 0
+    for name in get_role_permissions(role_id, db):
+        if name in bits:
+            mask |= 1 << bits[name]
+    return {"perms": format(mask, "x"), "rbac_ver": version}
 
-        if permission not in permissions:
+
+def _token_grants(token: str, permission: str, db: Session) -> Optional[bool]:
+    """
+    Answer from the token's bitmask, or None when it cannot be trusted (no
+    claims, or issued under an older RBAC version).
+    """
+    claims = jwt.get_unverified_claims(token)  # Verified by get_current_admin
+    version = current_rbac_version(db)
+    if version is None or "perms" not in claims or claims.get("rbac_ver") != version:
+        return None
+    bit = get_permission_bits(db).get(permission)
+    if bit is None:
+        return False
+    return bool(int(claims["perms"], 16) >> bit & 1)
+
+
+def check_permission(permission: str):
+    def permission_checker(
+        token: str = Depends(admin_oauth2_scheme),
+        current_admin: Admin = Depends(get_current_admin),
+        db: Session = Depends(get_db),
+    ):
+        granted = _token_grants(token, permission, db)
+        if granted is None:
+            granted = permission in get_role_permissions(current_admin.RoleID, db)
+        if not granted:
             role_name = (
                 db.query(Role.RoleName)
                 .filter(Role.RoleID == current_admin.RoleID)
@@ -41,14 +166,24 @@ def check_permission(permission: str):
     return permission_checker
 
 
-def get_role_permissions(role_id: int, db: Session) -> set[str]:
-    permissions = (
-        db.query(Permission.PermissionName)
-        .join(RolePermission, RolePermission.PermissionID == Permission.PermissionID)
-        .filter(RolePermission.RoleID == role_id)
-        .all()
-    )
-    return {p.PermissionName for p in permissions}
+def invalidate_role_permissions(db: Session) -> None:
+    """
+    Give RBAC a new version in the transaction that changes roles, permissions
+    or their assignments; call it before committing. The version is a random
+    UUID stored in the database, so it commits with the change, survives
+    whatever happens to Redis and never repeats: cached permission sets and
+    token bitmasks from before it are never trusted again. This worker
+    re-reads it once the transaction commits, others within
+    ROLE_PERMISSIONS_TTL seconds.
+    """
+    db.merge(RbacState(StateID=RBAC_STATE_ID, Version=uuid.uuid4().hex))
+
+    @event.listens_for(db, "after_commit", once=True)
+    def forget_version(session):
+        global _rbac_version, _permission_bits
+        _role_permissions.clear()
+        _permission_bits = (None, {})
+        _rbac_version = (None, 0.0)
 
 
 def has_permissions(role_id: int, required_permissions: list[str], db: Session) -> bool:
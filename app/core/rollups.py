@@ -0,0 +1,351 @@
+"""
+Incrementally maintained analytics rollups.
+
+TransactionRollups holds one row per (user, day, type, status) with a count
+and a sum. LoanPortfolioRollups holds one row per (user, loan status). The
+money-movement controllers bump them in the same transaction as the source
+row, so the analytics summaries read a handful of pre-aggregated rows instead
+of rescanning the transaction tables.
+
+If the rollups ever drift (a manual fix in the database, a deploy that
+skipped a write path), rebuild them from the source tables:
+
+    python -m app.core.rollups verify
+    python -m app.core.rollups rebuild
+
+Rebuild while writes are paused. A transaction committed during the rebuild
+can be counted twice.
+"""
+
+import argparse
+import sys
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+from sqlalchemy import (
+    Date,
+    and_,
+    case,
+    cast,
+    delete,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    union_all,
+    update,
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.deposit import Deposit
+from app.models.loan import Loan
+from app.models.rollup import LoanPortfolioRollup, TransactionRollup
+from app.models.transfer import Transfer
+from app.models.withdrawal import Withdrawal
+
+
+def _bump(db: Session, model, keys: Dict[str, Any], deltas: Dict[str, Any]) -> None:
+    """Add `deltas` to the rollup row at `keys`, creating it on first use."""
+    key_filter = [getattr(model, name) == value for name, value in keys.items()]
+    increments = {name: getattr(model, name) + delta for name, delta in deltas.items()}
+    if db.execute(update(model).where(*key_filter).values(**increments)).rowcount:
+        return
+    try:
+        with db.begin_nested():
+            db.execute(insert(model).values(**keys, **deltas))
+    except IntegrityError:
+        # A concurrent transaction created the row first; add to theirs
+        db.execute(update(model).where(*key_filter).values(**increments))
+
+
+def record_transaction_rollup(
+    db: Session,
+    user_id: int,
+    transaction_type: str,
+    transaction_status: str,
+    amount: Decimal,
+    day: Optional[date] = None,
+) -> None:
+    """
+    Count one transaction leg in the user's daily rollup.
+
+    `day` should be the date part of the source row's CreatedAt. When the
+    timestamp comes from the database default, leave it out and the database
+    clock is used as well.
+    """
+    _bump(
+        db,
+        TransactionRollup,
+        {
+            "UserID": user_id,
+            "Day": day if day is not None else cast(func.now(), Date),
+            "TransactionType": transaction_type,
+            "Status": transaction_status,
+        },
+        {"TxCount": 1, "TxAmount": Decimal(str(amount))},
+    )
+
+
+def move_loan_rollup(
+    db: Session,
+    user_id: int,
+    amount: Decimal,
+    from_status: Optional[str] = None,
+    to_status: Optional[str] = None,
+) -> None:
+    """Move one loan between status buckets of the user's loan portfolio."""
+    amount = Decimal(str(amount))
+    if from_status:
+        _bump(
+            db,
+            LoanPortfolioRollup,
+            {"UserID": user_id, "LoanStatus": from_status},
+            {"LoanCount": -1, "LoanAmount": -amount},
+        )
+    if to_status:
+        _bump(
+            db,
+            LoanPortfolioRollup,
+            {"UserID": user_id, "LoanStatus": to_status},
+            {"LoanCount": 1, "LoanAmount": amount},
+        )
+
+
+def transaction_totals(user_id: Optional[int] = None):
+    """
+    One-row subquery of completed transaction counts and sums per type, read
+    from the rollups for one user or, without `user_id`, for everyone.
+    """
+    columns = []
+    for transaction_type, name in [
+        ("Deposit", "deposit"),
+        ("TransferSent", "transfer_sent"),
+        ("TransferReceived", "transfer_received"),
+        ("Withdrawal", "withdrawal"),
+    ]:
+        is_type = TransactionRollup.TransactionType == transaction_type
+        columns += [
+            func.sum(case((is_type, TransactionRollup.TxCount))).label(f"{name}_count"),
+            func.sum(case((is_type, TransactionRollup.TxAmount))).label(
+                f"{name}_total"
+            ),
+        ]
+    query = select(*columns).where(TransactionRollup.Status == "Completed")
+    if user_id is not None:
+        query = query.where(TransactionRollup.UserID == user_id)
+    return query.subquery()
+
+
+def loan_totals(user_id: Optional[int] = None):
+    """One-row subquery of loan counts and amounts per status."""
+    columns = []
+    for loan_status in ["Pending", "Approved", "Rejected", "Repaid"]:
+        is_status = LoanPortfolioRollup.LoanStatus == loan_status
+        name = loan_status.lower()
+        columns += [
+            func.sum(case((is_status, LoanPortfolioRollup.LoanCount))).label(
+                f"{name}_count"
+            ),
+            func.sum(case((is_status, LoanPortfolioRollup.LoanAmount))).label(
+                f"{name}_amount"
+            ),
+        ]
+    query = select(*columns)
+    if user_id is not None:
+        query = query.where(LoanPortfolioRollup.UserID == user_id)
+    return query.subquery()
+
+
+ROLLUP_BUCKETS = ("day", "week", "month")
+
+_SERIES_KEYS = {
+    "Deposit": "deposits",
+    "TransferSent": "transfers_sent",
+    "TransferReceived": "transfers_received",
+    "Withdrawal": "withdrawals",
+}
+
+
+def bucket_start(day: date, bucket: str) -> date:
+    """First day of the day/week/month bucket containing `day` (weeks start Monday)."""
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def rollup_volume_series(
+    db: Session,
+    bucket: str = "day",
+    user_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Completed transaction counts and volumes per day, week or month.
+
+    The daily rollup rows are read in order and folded into coarser buckets
+    here, which keeps the query the same on every database.
+    """
+    query = select(
+        TransactionRollup.Day,
+        TransactionRollup.TransactionType,
+        TransactionRollup.TxCount,
+        TransactionRollup.TxAmount,
+    ).where(TransactionRollup.Status == "Completed")
+    if user_id is not None:
+        query = query.where(TransactionRollup.UserID == user_id)
+    if start_date:
+        query = query.where(TransactionRollup.Day >= start_date)
+    if end_date:
+        query = query.where(TransactionRollup.Day <= end_date)
+
+    series: Dict[date, Dict[str, Any]] = {}
+    for row in db.execute(query.order_by(TransactionRollup.Day)):
+        period = bucket_start(row.Day, bucket)
+        entry = series.setdefault(
+            period,
+            {key: {"count": 0, "amount": 0.0} for key in _SERIES_KEYS.values()},
+        )
+        totals = entry[_SERIES_KEYS[row.TransactionType]]
+        totals["count"] += row.TxCount
+        totals["amount"] += float(row.TxAmount)
+
+    return [
+        {"period": period.isoformat(), **totals} for period, totals in series.items()
+    ]
+
+
+def _expected_transaction_rollups():
+    """The transaction rollups recomputed from the source tables."""
+    legs = union_all(
+        *[
+            select(
+                owner.label("UserID"),
+                cast(model.CreatedAt, Date).label("Day"),
+                literal(transaction_type).label("TransactionType"),
+                model.Status.label("Status"),
+                model.Amount.label("Amount"),
+            )
+            for model, owner, transaction_type in [
+                (Deposit, Deposit.UserID, "Deposit"),
+                (Transfer, Transfer.SenderID, "TransferSent"),
+                (Transfer, Transfer.ReceiverID, "TransferReceived"),
+                (Withdrawal, Withdrawal.UserID, "Withdrawal"),
+            ]
+        ]
+    ).subquery()
+    return select(
+        legs.c.UserID,
+        legs.c.Day,
+        legs.c.TransactionType,
+        legs.c.Status,
+        func.count().label("TxCount"),
+        func.sum(legs.c.Amount).label("TxAmount"),
+    ).group_by(legs.c.UserID, legs.c.Day, legs.c.TransactionType, legs.c.Status)
+
+
+def _expected_loan_rollups():
+    """The loan portfolio rollups recomputed from the Loans table."""
+    return (
+        select(
+            Loan.UserID,
+            Loan.LoanStatus,
+            func.count().label("LoanCount"),
+            func.sum(Loan.LoanAmount).label("LoanAmount"),
+        )
+        .where(Loan.UserID.isnot(None))
+        .group_by(Loan.UserID, Loan.LoanStatus)
+    )
+
+
+def rebuild_rollups(db: Session) -> None:
+    """Replace both rollup tables with totals recomputed from the sources."""
+    db.execute(delete(TransactionRollup))
+    db.execute(
+        insert(TransactionRollup).from_select(
+            ["UserID", "Day", "TransactionType", "Status", "TxCount", "TxAmount"],
+            _expected_transaction_rollups(),
+        )
+    )
+    db.execute(delete(LoanPortfolioRollup))
+    db.execute(
+        insert(LoanPortfolioRollup).from_select(
+            ["UserID", "LoanStatus", "LoanCount", "LoanAmount"],
+            _expected_loan_rollups(),
+        )
+    )
+    db.commit()
+
+
+def _diff(db: Session, expected, model, keys: List[str], measures: List[str]):
+    """Rows where the stored rollup disagrees with the recomputed one."""
+    expected = expected.subquery()
+    stored = select(model).subquery()
+    join_on = and_(*[expected.c[k] == stored.c[k] for k in keys])
+    mismatch = or_(
+        *[
+            func.coalesce(expected.c[m], 0) != func.coalesce(stored.c[m], 0)
+            for m in measures
+        ]
+    )
+    query = (
+        select(
+            *[func.coalesce(expected.c[k], stored.c[k]).label(k) for k in keys],
+            *[expected.c[m].label(f"expected_{m}") for m in measures],
+            *[stored.c[m].label(f"stored_{m}") for m in measures],
+        )
+        .select_from(expected.join(stored, join_on, full=True))
+        .where(mismatch)
+    )
+    return [dict(row._mapping) for row in db.execute(query)]
+
+
+def verify_rollups(db: Session) -> Dict[str, List[Dict[str, Any]]]:
+    """Compare both rollup tables against the source tables."""
+    return {
+        "TransactionRollups": _diff(
+            db,
+            _expected_transaction_rollups(),
+            TransactionRollup,
+            ["UserID", "Day", "TransactionType", "Status"],
+            ["TxCount", "TxAmount"],
+        ),
+        "LoanPortfolioRollups": _diff(
+            db,
+            _expected_loan_rollups(),
+            LoanPortfolioRollup,
+            ["UserID", "LoanStatus"],
+            ["LoanCount", "LoanAmount"],
+        ),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from app.core.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Maintain the analytics rollups")
+    parser.add_argument("command", choices=["rebuild", "verify"])
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            rebuild_rollups(db)
+            print("Rollups rebuilt")
+            return 0
+
+        drift = verify_rollups(db)
+        for table, rows in drift.items():
+            print(f"{table}: {len(rows)} mismatched row(s)")
+            for row in rows[:20]:
+                print(f"  {row}")
+        return 1 if any(drift.values()) else 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
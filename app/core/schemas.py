@@ -31,3 +31,18 @@ class PaginatedResponse(BaseResponse):
             date: lambda v: v.isoformat(),
         },
     )
+
+
+class CursorPaginatedResponse(BaseResponse):
+    per_page: int
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+    total_items: Optional[int] = None  # Only computed when explicitly requested
+
+    model_config = ConfigDict(
+        from_attributes=True,
+        json_encoders={
+            datetime: lambda v: v.isoformat(),
+            date: lambda v: v.isoformat(),
+        },
+    )
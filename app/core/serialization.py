@@ -0,0 +1,151 @@
+"""
+Serializers and compression codecs for cached values.
+
+Values are serialized with CACHE_SERIALIZER (orjson, or msgpack if installed)
+and, once the result reaches CACHE_COMPRESSION_MIN_SIZE bytes, compressed with
+CACHE_COMPRESSION (zstd or lz4 if installed, none by default). Each cached
+entry records the ids of the format and codec it was written with, so entries
+stay readable when the settings change; an entry whose format or codec is not
+installed in this process simply reads as a miss.
+
+Decimals are serialized as strings so amounts keep every digit, the same way
+pydantic renders them in responses.
+"""
+
+import os
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Callable, Dict, Tuple
+import orjson
+
+CACHE_SERIALIZER = os.getenv("CACHE_SERIALIZER", "orjson")  # orjson or msgpack
+CACHE_COMPRESSION = os.getenv("CACHE_COMPRESSION", "none")  # none, zstd or lz4
+CACHE_COMPRESSION_MIN_SIZE = int(
+    os.getenv("CACHE_COMPRESSION_MIN_SIZE", "1024")
+)  # Bytes; smaller payloads are not worth the CPU
+
+RAW = 0  # Format id of payloads that are already bytes, e.g. a rendered response
+NO_COMPRESSION = 0
+
+Dumps = Callable[[Any], bytes]
+Loads = Callable[[bytes], Any]
+Compress = Callable[[bytes], bytes]
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+
+def _orjson() -> Tuple[Dumps, Loads]:
+    def dumps(value: Any) -> bytes:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+    return dumps, orjson.loads
+
+
+def _msgpack() -> Tuple[Dumps, Loads]:
+    import msgpack
+
+    def dumps(value: Any) -> bytes:
+        return msgpack.packb(value, default=_default, use_bin_type=True)
+
+    def loads(payload: bytes) -> Any:
+        return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+
+    return dumps, loads
+
+
+def _zstd() -> Tuple[Compress, Compress]:
+    import zstandard
+
+    return (lambda data: zstandard.compress(data, 3)), zstandard.decompress
+
+
+def _lz4() -> Tuple[Compress, Compress]:
+    import lz4.frame
+
+    return lz4.frame.compress, lz4.frame.decompress
+
+
+# name -> (id stored with each entry, loader); ids must never be reused
+SERIALIZERS: Dict[str, Tuple[int, Callable[[], Tuple[Dumps, Loads]]]] = {
+    "orjson": (1, _orjson),
+    "msgpack": (2, _msgpack),
+}
+CODECS: Dict[str, Tuple[int, Callable[[], Tuple[Compress, Compress]]]] = {
+    "zstd": (1, _zstd),
+    "lz4": (2, _lz4),
+}
+
+
+@lru_cache(maxsize=None)
+def _serializer(format_id: int) -> Tuple[Dumps, Loads]:
+    """Raises KeyError for unknown ids and ImportError if not installed."""
+    return {fid: load for fid, load in SERIALIZERS.values()}[format_id]()
+
+
+@lru_cache(maxsize=None)
+def _codec(codec_id: int) -> Tuple[Compress, Compress]:
+    """Raises KeyError for unknown ids and ImportError if not installed."""
+    return {cid: load for cid, load in CODECS.values()}[codec_id]()
+
+
+def _configured(registry: Dict, name: str, setting: str, loader: Callable) -> int:
+    if name not in registry:
+        raise RuntimeError(f"{setting} must be one of {', '.join(registry)}")
+    entry_id = registry[name][0]
+    try:
+        loader(entry_id)
+    except ImportError as e:
+        raise RuntimeError(f"{setting}={name} requires {e.name} to be installed")
+    return entry_id
+
+
+# Resolved at import so a misconfigured worker fails on startup
+FORMAT_ID = _configured(SERIALIZERS, CACHE_SERIALIZER, "CACHE_SERIALIZER", _serializer)
+CODEC_ID = (
+    NO_COMPRESSION
+    if CACHE_COMPRESSION == "none"
+    else _configured(CODECS, CACHE_COMPRESSION, "CACHE_COMPRESSION", _codec)
+)
+
+
+@lru_cache(maxsize=None)
+def readable(format_id: int, codec_id: int) -> bool:
+    """Whether entries written with this format and codec can be decoded here."""
+    try:
+        if format_id != RAW:
+            _serializer(format_id)
+        if codec_id != NO_COMPRESSION:
+            _codec(codec_id)
+    except (KeyError, ImportError):
+        return False
+    return True
+
+
+def dumps(value: Any) -> bytes:
+    return _serializer(FORMAT_ID)[0](value)
+
+
+def loads(format_id: int, payload: bytes) -> Any:
+    if format_id == RAW:
+        return payload
+    return _serializer(format_id)[1](payload)
+
+
+def compress(payload: bytes) -> Tuple[int, bytes]:
+    """(codec id, data) for `payload`, compressed if it is large enough."""
+    if CODEC_ID == NO_COMPRESSION or len(payload) < CACHE_COMPRESSION_MIN_SIZE:
+        return NO_COMPRESSION, payload
+    return CODEC_ID, _codec(CODEC_ID)[0](payload)
+
+
+def decompress(codec_id: int, data: bytes) -> bytes:
+    if codec_id == NO_COMPRESSION:
+        return data
+    return _codec(codec_id)[1](data)
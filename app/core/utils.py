@@ -3,13 +3,11 @@ import os
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 from app.core.exceptions import CustomHTTPException
+from app.core.hashing import hash_secret, verify_secret
 from typing import TypeVar, Type
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 T = TypeVar("T")
 
 
@@ -47,11 +45,11 @@ def send_email(to_email: str, subject: str, body: str) -> None:
 
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return hash_secret(password)
 
 
 def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+    return verify_secret(plain, hashed)
 
 
 def check_unique_field(
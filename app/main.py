@@ -6,12 +6,14 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import HTTPException as FastAPIHTTPException
 from fastapi.middleware.gzip import GZipMiddleware
 
+from app.core.limiter import RateLimitExceeded
 from app.core.rate_limiter import limiter, custom_rate_limit_handler
-from slowapi.errors import RateLimitExceeded
 from app.core.exceptions import CustomHTTPException
 from app.core.schemas import BaseResponse
 from app.routes import admins, users, atm, rbac, websocket as websocket_routes
-from app.core.database import get_db
+from app.core.database import database_pool_stats, dispose_async_engine
+from app.core.hashing import hashing_stats
+from app.controllers.transactions.export_jobs import shutdown_export_jobs
 
 app = FastAPI(
     title="AUT Banking System",
@@ -43,24 +45,39 @@ app.add_middleware(
 )
 
 # <========== Rate limiting middleware ==========>
-app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, custom_rate_limit_handler)
 
 
-# <========== Storing DB session in app state for use in rate limiter ==========>
 @app.middleware("http")
-async def add_db_to_request(request: Request, call_next):
-    db = next(get_db())  # Get DB session
-    request.state.db = db
+async def add_rate_limit_headers(request: Request, call_next):
+    # Set by the limiter on routes it admitted; rejections carry their own
+    response = await call_next(request)
+    response.headers.update(getattr(request.state, "rate_limit_headers", {}))
+    return response
+
+
+# <========== Closing the request-scoped DB session ==========>
+@app.middleware("http")
+async def close_request_db(request: Request, call_next):
+    # The session is only created if the route or rate limiter needed one.
+    # Routes commit their own work; closing rolls back anything left over.
     try:
-        response = await call_next(request)
-        db.commit()  # Commit only if successful
-        return response
-    except Exception as e:
-        db.rollback()  # Rollback on any error
-        raise e  # Re-raise for FastAPI to handle
+        return await call_next(request)
     finally:
-        db.close()  # Always close the session
+        db = getattr(request.state, "db", None)
+        if db is not None:
+            db.close()
+
+
+# <========== Background export pool ==========>
+@app.on_event("shutdown")
+def stop_export_jobs():
+    shutdown_export_jobs()
+
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    await dispose_async_engine()
 
 
 # <========== API routes ==========>
@@ -138,6 +155,7 @@ async def health_check(request: Request):
     return {
         "success": True,
         "message": "System is healthy",
+        "data": {"hashing": hashing_stats(), "db_pools": database_pool_stats()},
         "status_code": status.HTTP_200_OK,
     }
 
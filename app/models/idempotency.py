@@ -0,0 +1,14 @@
+from sqlalchemy import CHAR, Column, DateTime, Index, UnicodeText
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class IdempotencyRecord(Base):
+    __tablename__ = "IdempotencyKeys"
+    __table_args__ = (Index("idx_idempotency_expires", "ExpiresAt"),)
+
+    KeyHash = Column(CHAR(64), primary_key=True)  # HMAC of scope and client key
+    RequestHash = Column(CHAR(64), nullable=False)  # HMAC of the request body
+    ResponseBody = Column(UnicodeText)  # JSON; NULL until the request completes
+    CreatedAt = Column(DateTime, server_default=func.now())
+    ExpiresAt = Column(DateTime, nullable=False)
@@ -0,0 +1,39 @@
+from sqlalchemy import (
+    CheckConstraint,
+    Column,
+    Integer,
+    String,
+    DateTime,
+    DECIMAL,
+    ForeignKey,
+    Index,
+    UniqueConstraint,
+)
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class LedgerEntry(Base):
+    __tablename__ = "LedgerEntries"
+    __table_args__ = (
+        UniqueConstraint("UserID", "Sequence", name="UQ_LedgerEntries_UserSequence"),
+        Index("idx_ledger_user_created", "UserID", "CreatedAt"),
+    )
+
+    EntryID = Column(Integer, primary_key=True, index=True)
+    UserID = Column(Integer, ForeignKey("Users.UserID"), nullable=False)
+    Sequence = Column(Integer, nullable=False)  # Per-account, strictly increasing
+    TransactionType = Column(
+        String(20),
+        CheckConstraint(
+            "TransactionType IN ('Deposit', 'Transfer', 'Withdrawal', 'LoanPayment', 'LoanDisbursement')"
+        ),
+        nullable=False,
+    )
+    TransactionID = Column(Integer, nullable=False)  # ID in the source table
+    CounterpartyID = Column(Integer, ForeignKey("Users.UserID"), nullable=True)
+    Amount = Column(DECIMAL(19, 4), nullable=False)  # Signed: credit > 0, debit < 0
+    BalanceAfter = Column(DECIMAL(19, 4), nullable=False)
+    ReferenceNumber = Column(String(50), nullable=True)
+    Description = Column(String(255), nullable=True)
+    CreatedAt = Column(DateTime, server_default=func.now())
@@ -1,6 +1,8 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import CHAR, Column, Integer, String, ForeignKey
 from app.core.database import Base
 
+RBAC_STATE_ID = 1  # RbacState holds a single row
+
 
 class Role(Base):
     __tablename__ = "Roles"
@@ -30,3 +32,10 @@ class RolePermission(Base):
         ForeignKey("Permissions.PermissionID", ondelete="CASCADE"),
         nullable=False,
     )
+
+
+class RbacState(Base):
+    __tablename__ = "RbacState"
+
+    StateID = Column(Integer, primary_key=True)
+    Version = Column(CHAR(32), nullable=False)  # New UUID on every RBAC change
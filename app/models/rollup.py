@@ -0,0 +1,46 @@
+from sqlalchemy import (
+    CheckConstraint,
+    Column,
+    Date,
+    DECIMAL,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+)
+from app.core.database import Base
+
+
+class TransactionRollup(Base):
+    __tablename__ = "TransactionRollups"
+    __table_args__ = (Index("idx_rollups_day", "Day"),)
+
+    UserID = Column(
+        Integer, ForeignKey("Users.UserID", ondelete="CASCADE"), primary_key=True
+    )
+    Day = Column(Date, primary_key=True)
+    TransactionType = Column(
+        String(20),
+        CheckConstraint(
+            "TransactionType IN ('Deposit', 'TransferSent', 'TransferReceived', 'Withdrawal')"
+        ),
+        primary_key=True,
+    )  # Transfers are split by direction so per-user totals need no join
+    Status = Column(String(20), primary_key=True)
+    TxCount = Column(Integer, nullable=False, default=0)
+    TxAmount = Column(DECIMAL(19, 4), nullable=False, default=0)
+
+
+class LoanPortfolioRollup(Base):
+    __tablename__ = "LoanPortfolioRollups"
+
+    UserID = Column(
+        Integer, ForeignKey("Users.UserID", ondelete="CASCADE"), primary_key=True
+    )
+    LoanStatus = Column(
+        String(20),
+        CheckConstraint("LoanStatus IN ('Pending', 'Approved', 'Rejected', 'Repaid')"),
+        primary_key=True,
+    )
+    LoanCount = Column(Integer, nullable=False, default=0)
+    LoanAmount = Column(DECIMAL(19, 4), nullable=False, default=0)
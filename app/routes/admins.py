@@ -1,7 +1,8 @@
 # app/routes/admins.py
 from datetime import date, datetime
-from typing import Optional
-from fastapi import APIRouter, Depends, Query, Request
+from typing import Optional, Union
+from fastapi import APIRouter, Depends, Header, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.core.rate_limiter import (
     limiter,
@@ -9,8 +10,7 @@ from app.core.rate_limiter import (
     CACHE_TTL_SHORT,
     CACHE_TTL_MEDIUM,
     get_cache_key,
-    get_from_cache,
-    set_to_cache,
+    cached_response,
     invalidate_cache,
 )
 from fastapi import BackgroundTasks
@@ -40,6 +40,11 @@ from app.controllers.transactions.admins import (
     get_all_transactions,
     export_transactions,
 )
+from app.controllers.transactions.export_jobs import (
+    download_export_job,
+    get_export_job,
+)
+from app.controllers.transactions.timeseries import get_analytics_timeseries
 from app.controllers.loans.admins import (
     get_loan_by_id,
     approve_loan,
@@ -70,10 +75,11 @@ from app.schemas.deposit_schema import DepositCreate
 from app.schemas.user_schema import Order, SortBy, UserUpdate
 
 # Core
-from app.core.database import get_db
-from app.core.schemas import BaseResponse, PaginatedResponse
+from app.core.database import get_async_db, get_db, get_read_db
+from app.core.schemas import BaseResponse, CursorPaginatedResponse, PaginatedResponse
 from app.core.auth import refresh_token
-from app.core.rbac import check_permission
+from app.core.idempotency import run_idempotent
+from app.core.rbac import check_permission, permission_claims
 
 # Models
 from app.models.admin import Admin
@@ -104,7 +110,7 @@ def register(
     db: Session = Depends(get_db),
 ):
     result = register_admin(admin, db)
-    invalidate_cache("admins:")  # Invalidate admin list cache
+    invalidate_cache("admins")  # Invalidate admin list cache
     return result
 
 
@@ -117,7 +123,9 @@ def login(request: Request, credentials: AdminLogin, db: Session = Depends(get_d
 @router.post("/refresh", response_model=BaseResponse)
 @limiter.limit(os.getenv("RATE_LIMIT_USER_DEFAULT", "100/hour"))
 def refresh(request: Request, token: str, db: Session = Depends(get_db)):
-    return refresh_token(token, db, Admin, "Admin", "AdminID")
+    return refresh_token(
+        token, db, Admin, "Admin", "AdminID", access_claims=permission_claims
+    )
 
 
 @router.get("/me", response_model=BaseResponse)
@@ -127,13 +135,17 @@ def get_current_admin_route(
     current_admin: Admin = Depends(check_permission("admin:view_self")),
     db: Session = Depends(get_db),
 ):
-    cache_key = get_cache_key(request, f"admin:{current_admin.AdminID}")
-    cached = get_from_cache(cache_key)
-    if cached:
-        return BaseResponse(**cached)
-    result = get_current_admin(current_admin.AdminID, db)
-    set_to_cache(cache_key, result, CACHE_TTL_MEDIUM)  # 1 hr TTL
-    return result
+    cache_key = get_cache_key(
+        request,
+        f"admin:{current_admin.AdminID}",
+        namespaces=[f"admin:{current_admin.AdminID}"],
+    )
+    return cached_response(
+        cache_key,
+        CACHE_TTL_MEDIUM,  # 1 hr TTL
+        lambda: get_current_admin(current_admin.AdminID, db),
+        BaseResponse,
+    )
 
 
 @router.put("/me", response_model=BaseResponse)
@@ -145,8 +157,7 @@ def update_current_admin_route(
     db: Session = Depends(get_db),
 ):
     result = update_current_admin(current_admin.AdminID, admin_update, db)
-    invalidate_cache(f"admin:{current_admin.AdminID}")
-    invalidate_cache("admins:")
+    invalidate_cache(f"admin:{current_admin.AdminID}", "admins")
     return result
 
 
@@ -169,13 +180,15 @@ def get_admin_by_id_route(
     current_admin: Admin = Depends(check_permission("admin:view_all")),
     db: Session = Depends(get_db),
 ):
-    cache_key = get_cache_key(request, f"admin:{admin_id}")
-    cached = get_from_cache(cache_key)
-    if cached:
-        return BaseResponse(**cached)
-    result = get_admin_by_id(admin_id, db)
-    set_to_cache(cache_key, result, CACHE_TTL_MEDIUM)  # 1 hr TTL
-    return result
+    cache_key = get_cache_key(
+        request, f"admin:{admin_id}", namespaces=[f"admin:{admin_id}"]
+    )
+    return cached_response(
+        cache_key,
+        CACHE_TTL_MEDIUM,  # 1 hr TTL
+        lambda: get_admin_by_id(admin_id, db),
+        BaseResponse,
+    )
 
 
 @router.put("/admins/{admin_id}", response_model=BaseResponse)
@@ -188,8 +201,7 @@ def update_admin_route(
     db: Session = Depends(get_db),
 ):
     result = update_other_admin(admin_id, update_data, current_admin.AdminID, db)
-    invalidate_cache(f"admin:{admin_id}")
-    invalidate_cache("admins:")
+    invalidate_cache(f"admin:{admin_id}", "admins")
     return result
 
 
@@ -202,8 +214,7 @@ def delete_admin_route(
     db: Session = Depends(get_db),
 ):
     result = delete_admin(admin_id, current_admin.AdminID, db)
-    invalidate_cache(f"admin:{admin_id}")
-    invalidate_cache("admins:")
+    invalidate_cache(f"admin:{admin_id}", "admins")
     return result
 
 
@@ -215,13 +226,15 @@ def get_user_by_id_route(
     current_admin: Admin = Depends(check_permission("user:view_all")),
     db: Session = Depends(get_db),
 ):
-    cache_key = get_cache_key(request, f"user:{user_id}")
-    cached = get_from_cache(cache_key)
-    if cached:
-        return BaseResponse(**cached)
-    result = get_user_by_id(user_id, db)
-    set_to_cache(cache_key, result, CACHE_TTL_MEDIUM)  # 1 hr TTL
-    return result
+    cache_key = get_cache_key(
+        request, f"user_details:{user_id}", namespaces=[f"user:{user_id}"]
+    )
+    return cached_response(
+        cache_key,
+        CACHE_TTL_MEDIUM,  # 1 hr TTL
+        lambda: get_user_by_id(user_id, db),
+        BaseResponse,
+    )
 
 
 @router.get("/users/{user_id}/deposits", response_model=PaginatedResponse)
@@ -249,24 +262,28 @@ def get_user_deposits_route(
         "order": order,
     }
     cache_key = get_cache_key(
-        request, f"user_deposits:{user_id}", current_admin.AdminID, params
+        request,
+        f"user_deposits:{user_id}",
+        current_admin.AdminID,
+        params,
+        namespaces=[f"user:{user_id}"],
     )
-    cached = get_from_cache(cache_key)
-    if cached:
-        return PaginatedResponse(**cached)
-    result = get_user_deposits(
-        user_id,
-        db,
-        page,
-        per_page,
-        deposit_status,
-        start_date,
-        end_date,
-        sort_by,
-        order,
+    return cached_response(
+        cache_key,
+        CACHE_TTL_MEDIUM,  # 1 hr TTL
+        lambda: get_user_deposits(
+            user_id,
+            db,
+            page,
+            per_page,
+            deposit_status,
+            start_date,
+            end_date,
+            sort_by,
+            order,
+        ),
+        PaginatedResponse,
     )
-    set_to_cache(cache_key, result.model_dump(), CACHE_TTL_MEDIUM)  # 1 hr TTL
-    return result
 
 
 @router.get("/loans/{loan_id}", response_model=BaseResponse)
@@ -277,13 +294,13 @@ def get_loan_by_id_route(
     current_admin: Admin = Depends(check_permission("loan:view_all")),
     db: Session = Depends(get_db),
 ):
-    cache_key = get_cache_key(request, f"loan:{loan_id}")
-    cached = get_from_cache(cache_key)
-    if cached:
-        return BaseResponse(**cached)
-    result = get_loan_by_id(loan_id, db)
-    set_to_cache(cache_key, result, CACHE_TTL_MEDIUM)  # 1 hr TTL
-    return result
+    cache_key = get_cache_key(request, f"loan:{loan_id}", namespaces=["loans"])
+    return cached_response(
+        cache_key,
+        CACHE_TTL_MEDIUM,  # 1 hr TTL
+        lambda: get_loan_by_id(loan_id, db),
+        BaseResponse,
+    )
 
 
 @router.put("/loans/{loan_id}/reject", response_model=BaseResponse)
@@ -293,11 +310,10 @@ async def reject_loan_route(
     loan_id: int,
     background_tasks: BackgroundTasks,
     current_admin: Admin = Depends(check_permission("loan:approve")),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     result = await reject_loan(loan_id, current_admin, db, background_tasks)
-    invalidate_cache("loans:")
-    invalidate_cache("analytics:summary")
+    invalidate_cache(f"user:{result['data']['UserID']}", "users", "loans", "analytics")
     return result
 
 
@@ -309,13 +325,13 @@ def get_card_by_id_route(
     current_admin: Admin = Depends(check_permission("card:view_all")),
     db: Session = Depends(get_db),
 ):
-    cache_key = get_cache_key(request, f"card:{card_id}")
-    cached = get_from_cache(cache_key)
-    if cached:
-        return BaseResponse(**cached)
-    result = get_card_by_id(card_id, db)
-    set_to_cache(cache_key, result, CACHE_TTL_MEDIUM)  # 1 hr TTL
-    return result
+    cache_key = get_cache_key(request, f"card:{card_id}", namespaces=["cards"])
+    return cached_response(
+        cache_key,
+        CACHE_TTL_MEDIUM,  # 1 hr TTL
+        lambda: get_card_by_id(card_id, db),
+        BaseResponse,
+    )
 
 
 @router.put("/cards/{card_id}/unblock", response_model=BaseResponse)
@@ -327,7 +343,7 @@ def unblock_card_route(
     db: Session = Depends(get_db),
 ):
     result = unblock_card(card_id, db)
-    invalidate_cache("cards:")
+    invalidate_cache("cards")
     return result
 
 
@@ -341,14 +357,16 @@ def get_transaction_by_id_route(
     db: Session = Depends(get_db),
 ):
     cache_key = get_cache_key(
-        request, f"transaction:{transaction_type}:{transaction_id}"
+        request,
+        f"transaction:{transaction_type}:{transaction_id}",
+        namespaces=["transactions"],
+    )
+    return cached_response(
+        cache_key,
+        CACHE_TTL_MEDIUM,  # 1 hr TTL
+        lambda: get_transaction_by_id(transaction_id, transaction_type, db),
+        BaseResponse,
     )
-    cached = get_from_cache(cache_key)
-    if cached:
-        return BaseResponse(**cached)
-    result = get_transaction_by_id(transaction_id, transaction_type, db)
-    set_to_cache(cache_key, result, CACHE_TTL_MEDIUM)  # 1 hr TTL
-    return result
 
 
 @router.get("/analytics/summary", response_model=BaseResponse)
@@ -356,15 +374,30 @@ def get_transaction_by_id_route(
 def get_analytics_summary_route(
     request: Request,
     current_admin: Admin = Depends(check_permission("analytics:view")),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
-    cache_key = get_cache_key(request, "analytics:summary", current_admin.AdminID)
-    cached = get_from_cache(cache_key)
-    if cached:
-        return BaseResponse(**cached)
-    result = get_analytics_summary(db)
-    set_to_cache(cache_key, result, CACHE_TTL_SHORT)  # 5 min TTL for analytics
-    return result
+    # Not admin-specific, so every admin shares one cache entry
+    cache_key = get_cache_key(request, "analytics:summary", namespaces=["analytics"])
+    return cached_response(
+        cache_key,
+        CACHE_TTL_SHORT,  # 5 min TTL for analytics
+        lambda: get_analytics_summary(db),
+        BaseResponse,
+    )
+
+
+@router.get("/analytics/timeseries", response_model=BaseResponse)
+@limiter.limit(os.getenv("RATE_LIMIT_USER_DEFAULT", "100/hour"))
+def get_analytics_timeseries_route(
+    request: Request,
+    bucket: str = Query("day", description="hour, day or month"),
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    current_admin: Admin = Depends(check_permission("analytics:view")),
+    db: Session = Depends(get_read_db),
+):
+    # Cached per bucket inside the controller
+    return get_analytics_timeseries(db, bucket, start, end)
 
 
 @router.get("/admins", response_model=PaginatedResponse)
@@ -390,25 +423,25 @@ def list_all_admins(
         "sort_by": sort_by,
         "order": order,
     }
-    cache_key = get_cache_key(request, "admins", current_admin.AdminID, params)
-    cached = get_from_cache(cache_key)
-    if cached:
-        return PaginatedResponse(**cached)
-    result = get_all_admins(
-        db,
-        current_admin_id=current_admin.AdminID,
-        page=page,
-        per_page=per_page,
-        username=username,
-        email=email,
-        role=role,
-        sort_by=sort_by,
-        order=order,
+    cache_key = get_cache_key(
+        request, "admins", current_admin.AdminID, params, namespaces=["admins"]
+    )
+    return cached_response(
+        cache_key,
+        CACHE_TTL_MEDIUM,  # 1 hr TTL for admin list
+        lambda: get_all_admins(
+            db,
+            current_admin_id=current_admin.AdminID,
+            page=page,
+            per_page=per_page,
+            username=username,
+            email=email,
+            role=role,
+            sort_by=sort_by,
+            order=order,
+        ),
+        PaginatedResponse,
     )
-    set_to_cache(
-        cache_key, result.model_dump(), CACHE_TTL_MEDIUM
-    )  # 1 hr TTL for admin list
-    return result
 
 
 @router.put("/users/toggle_user_status/{user_id}", response_model=BaseResponse)
@@ -420,8 +453,7 @@ def toggle_user_status(
     db: Session = Depends(get_db),
 ):
     result = toggle_user_active_status(user_id, current_admin.AdminID, db)
-    invalidate_cache(f"users:user:{user_id}")  # Invalidate user-specific cache
-    invalidate_cache("users:")  # Invalidate user list cache
+    invalidate_cache(f"user:{user_id}", "users")
     return result
 
 
@@ -440,7 +472,7 @@ def list_users(
     sort_by: Optional[SortBy] = None,
     order: Optional[Order] = None,
     current_admin: Admin = Depends(check_permission("user:view_all")),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     params = {
         "page": page,
@@ -454,25 +486,27 @@ def list_users(
         "sort_by": sort_by,
         "order": order,
     }
-    cache_key = get_cache_key(request, "users", current_admin.AdminID, params)
-    cached = get_from_cache(cache_key)
-    if cached:
-        return PaginatedResponse(**cached)
-    result = get_all_users(
-        page,
-        per_page,
-        username,
-        email,
-        isactive,
-        account_type,
-        balance_min,
-        balance_max,
-        sort_by,
-        order,
-        db,
+    cache_key = get_cache_key(
+        request, "users", current_admin.AdminID, params, namespaces=["users"]
+    )
+    return cached_response(
+        cache_key,
+        CACHE_TTL_SHORT,
+        lambda: get_all_users(
+            page,
+            per_page,
+            username,
+            email,
+            isactive,
+            account_type,
+            balance_min,
+            balance_max,
+            sort_by,
+            order,
+            db,
+        ),
+        PaginatedResponse,
     )
-    set_to_cache(cache_key, result, CACHE_TTL_SHORT)
-    return result
 
 
 @router.post("/users/{user_id}/deposits", response_model=BaseResponse)
@@ -483,18 +517,27 @@ async def create_user_deposit(
     deposit: DepositCreate,
     background_tasks: BackgroundTasks,
     current_admin: Admin = Depends(check_permission("deposit:manage")),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
 ):
-    result = await create_deposit(
-        user_id=user_id,
-        admin_id=current_admin.AdminID,
-        deposit=deposit,
-        db=db,
-        background_tasks=background_tasks,
+    async def deposit_once():
+        result = await create_deposit(
+            user_id=user_id,
+            admin_id=current_admin.AdminID,
+            deposit=deposit,
+            db=db,
+            background_tasks=background_tasks,
+        )
+        invalidate_cache(f"user:{user_id}", "users", "transactions", "analytics")
+        return result
+
+    return await run_idempotent(
+        db,
+        idempotency_key,
+        f"deposit:admin:{current_admin.AdminID}",
+        {"user_id": user_id, "deposit": deposit},
+        deposit_once,
     )
-    invalidate_cache(f"users:user:{user_id}")  # Invalidate user-specific cache
-    invalidate_cache("analytics:summary")  # Invalidate analytics cache
-    return result
 
 
 @router.get("/loans", response_model=PaginatedResponse)
@@ -502,7 +545,7 @@ async def create_user_deposit(
 def list_all_loans(
     request: Request,
     current_admin: Admin = Depends(check_permission("loan:view_all")),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=100),
     loan_status: Optional[str] = Query(None),
@@ -524,24 +567,26 @@ def list_all_loans(
         "sort_by": sort_by,
         "order": order,
     }
-    cache_key = get_cache_key(request, "loans", current_admin.AdminID, params)
-    cached = get_from_cache(cache_key)
-    if cached:
-        return PaginatedResponse(**cached)
-    result = get_all_loans(
-        db,
-        page,
-        per_page,
-        loan_status,
-        user_id,
-        loan_type_id,
-        start_date,
-        end_date,
-        sort_by,
-        order,
+    cache_key = get_cache_key(
+        request, "loans", current_admin.AdminID, params, namespaces=["loans"]
+    )
+    return cached_response(
+        cache_key,
+        CACHE_TTL_SHORT,
+        lambda: get_all_loans(
+            db,
+            page,
+            per_page,
+            loan_status,
+            user_id,
+            loan_type_id,
+            start_date,
+            end_date,
+            sort_by,
+            order,
+        ),
+        PaginatedResponse,
     )
-    set_to_cache(cache_key, result.model_dump(), CACHE_TTL_SHORT)
-    return result
 
 
 @router.put("/loans/{loan_id}/approve", response_model=BaseResponse)
@@ -551,11 +596,10 @@ async def approve_loan_route(
     loan_id: int,
     background_tasks: BackgroundTasks,
     current_admin: Admin = Depends(check_permission("loan:approve")),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     result = await approve_loan(loan_id, current_admin, db, background_tasks)
-    invalidate_cache("loans:")
-    invalidate_cache("analytics:summary")
+    invalidate_cache(f"user:{result['data']['UserID']}", "users", "loans", "analytics")
     return result
 
 
@@ -569,8 +613,7 @@ def update_user_route(
     db: Session = Depends(get_db),
 ):
     result = update_user(user_id, user_update, db)
-    invalidate_cache(f"users:user:{user_id}")
-    invalidate_cache("users:")
+    invalidate_cache(f"user:{user_id}", "users")
     return result
 
 
@@ -583,12 +626,13 @@ def delete_user_route(
     db: Session = Depends(get_db),
 ):
     result = delete_user(user_id, db)
-    invalidate_cache(f"users:user:{user_id}")
-    invalidate_cache("users:")
+    invalidate_cache(f"user:{user_id}", "users")
     return result
 
 
-@router.get("/transactions", response_model=PaginatedResponse)
+@router.get(
+    "/transactions", response_model=Union[PaginatedResponse, CursorPaginatedResponse]
+)
 @limiter.limit(os.getenv("RATE_LIMIT_USER_DEFAULT", "100/hour"))
 def list_all_transactions(
     request: Request,
@@ -602,7 +646,11 @@ def list_all_transactions(
     end_date: Optional[datetime] = Query(None),
     sort_by: Optional[str] = Query("CreatedAt"),
     order: Optional[str] = Query("desc"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(
+        None, description="Opaque keyset cursor; pass an empty value for page one"
+    ),
+    include_total: bool = Query(False),
+    db: Session = Depends(get_read_db),
 ):
     params = {
         "page": page,
@@ -614,27 +662,35 @@ def list_all_transactions(
         "end_date": str(end_date),
         "sort_by": sort_by,
         "order": order,
+        "cursor": cursor,
+        "include_total": include_total,
     }
-    cache_key = get_cache_key(request, "transactions", current_admin.AdminID, params)
-    cached = get_from_cache(cache_key)
-    if cached:
-        return PaginatedResponse(**cached)
-    result = get_all_transactions(
-        db,
-        page,
-        per_page,
-        transaction_type,
-        transaction_status,
-        user_id,
-        start_date,
-        end_date,
-        sort_by,
-        order,
+    cache_key = get_cache_key(
+        request,
+        "transactions",
+        current_admin.AdminID,
+        params,
+        namespaces=["transactions"],
+    )
+    return cached_response(
+        cache_key,
+        CACHE_TTL_SHORT,  # 5 min TTL for transactions
+        lambda: get_all_transactions(
+            db,
+            page=page,
+            per_page=per_page,
+            user_id=user_id,
+            transaction_type=transaction_type,
+            transaction_status=transaction_status,
+            start_date=start_date,
+            end_date=end_date,
+            sort_by=sort_by,
+            order=order,
+            cursor=cursor,
+            include_total=include_total,
+        ),
+        CursorPaginatedResponse if cursor is not None else PaginatedResponse,
     )
-    set_to_cache(
-        cache_key, result.model_dump(), CACHE_TTL_SHORT
-    )  # 5 min TTL for transactions
-    return result
 
 
 @router.get("/cards", response_model=PaginatedResponse)
@@ -645,16 +701,18 @@ def list_all_cards_route(
     per_page: int = Query(10, ge=1, le=100),
     user_id: Optional[int] = Query(None),
     current_admin: Admin = Depends(check_permission("card:view_all")),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     params = {"page": page, "per_page": per_page, "user_id": user_id}
-    cache_key = get_cache_key(request, "cards", current_admin.AdminID, params)
-    cached = get_from_cache(cache_key)
-    if cached:
-        return PaginatedResponse(**cached)
-    result = list_all_cards(db, page, per_page, user_id)
-    set_to_cache(cache_key, result.model_dump(), CACHE_TTL_MEDIUM)  # 1 hr TTL for cards
-    return result
+    cache_key = get_cache_key(
+        request, "cards", current_admin.AdminID, params, namespaces=["cards"]
+    )
+    return cached_response(
+        cache_key,
+        CACHE_TTL_MEDIUM,  # 1 hr TTL for cards
+        lambda: list_all_cards(db, page, per_page, user_id),
+        PaginatedResponse,
+    )
 
 
 @router.put("/cards/{card_id}/block", response_model=BaseResponse)
@@ -666,7 +724,7 @@ def block_card_route(
     db: Session = Depends(get_db),
 ):
     result = block_card(card_id, db)
-    invalidate_cache("cards:")
+    invalidate_cache("cards", f"user:{result['data']['UserID']}")
     return result
 
 
@@ -680,7 +738,7 @@ def update_card_admin_route(
     db: Session = Depends(get_db),
 ):
     result = update_card_admin(card_id, card_update, db)
-    invalidate_cache("cards:")
+    invalidate_cache("cards", f"user:{result['data']['UserID']}")
     return result
 
 
@@ -693,9 +751,45 @@ def export_transactions_route(
     end_date: Optional[datetime] = Query(None),
     transaction_status: Optional[str] = Query(None),
     transaction_type: Optional[str] = Query(None),
+    background: bool = Query(
+        False, description="Queue the export as a job instead of streaming it"
+    ),
+    export_format: str = Query(
+        "csv", alias="format", description="csv, ndjson, parquet or arrow"
+    ),
     current_admin: Admin = Depends(check_permission("transactions:export")),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     return export_transactions(
-        db, user_id, start_date, end_date, transaction_status, transaction_type
+        db,
+        user_id=user_id,
+        start_date=start_date,
+        end_date=end_date,
+        transaction_status=transaction_status,
+        transaction_type=transaction_type,
+        background=background,
+        export_format=export_format,
+        admin_id=current_admin.AdminID,
+    )
+
+
+@router.get("/transactions/export/jobs/{job_id}", response_model=BaseResponse)
+@limiter.limit(os.getenv("RATE_LIMIT_USER_DEFAULT", "100/hour"))
+def get_export_job_route(
+    request: Request,
+    job_id: str,
+    current_admin: Admin = Depends(check_permission("transactions:export")),
+):
+    return get_export_job(job_id, f"admin:{current_admin.AdminID}")
+
+
+@router.get("/transactions/export/jobs/{job_id}/download")
+@limiter.limit(os.getenv("RATE_LIMIT_USER_DEFAULT", "100/hour"))
+def download_export_job_route(
+    request: Request,
+    job_id: str,
+    current_admin: Admin = Depends(check_permission("transactions:export")),
+):
+    return download_export_job(
+        job_id, f"admin:{current_admin.AdminID}", request.headers.get("Range")
     )
@@ -1,11 +1,13 @@
 # app/routes/atm.py
-from fastapi import APIRouter, Depends, Request, BackgroundTasks
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, Request, BackgroundTasks
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.core.idempotency import run_idempotent
 from app.schemas.withdrawal_schema import WithdrawalCreate
 from app.controllers.withdrawals.atm import create_withdrawal
 from app.core.schemas import BaseResponse
-from app.core.rate_limiter import limiter
+from app.core.rate_limiter import invalidate_cache, limiter
 import os
 
 router = APIRouter()
@@ -17,6 +19,20 @@ async def create_withdrawal_route(
     request: Request,
     withdrawal: WithdrawalCreate,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
 ):
-    return await create_withdrawal(withdrawal, db, background_tasks)
+    async def withdraw_once():
+        result = await create_withdrawal(withdrawal, db, background_tasks)
+        invalidate_cache(
+            f"user:{result['data']['UserID']}", "transactions", "analytics"
+        )
+        return result
+
+    return await run_idempotent(
+        db,
+        idempotency_key,
+        f"withdrawal:card:{withdrawal.CardNumber}",
+        withdrawal,
+        withdraw_once,
+    )
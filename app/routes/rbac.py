@@ -31,8 +31,7 @@ from app.core.rate_limiter import (
     limiter,
     CACHE_TTL_LONG,
     get_cache_key,
-    get_from_cache,
-    set_to_cache,
+    cached_response,
     invalidate_cache,
 )
 import os
@@ -49,7 +48,7 @@ def create_role_route(
     db: Session = Depends(get_db),
 ):
     result = create_role(role_input, db)
-    invalidate_cache("roles:")
+    invalidate_cache("roles")
     return result
 
 
@@ -60,13 +59,13 @@ def list_roles_route(
     current_admin: Admin = Depends(check_permission("rbac:view_roles")),
     db: Session = Depends(get_db),
 ):
-    cache_key = get_cache_key(request, "roles")
-    cached = get_from_cache(cache_key)
-    if cached:
-        return BaseResponse(**cached)
-    result = list_roles(db)
-    set_to_cache(cache_key, result, CACHE_TTL_LONG)  # 24 hr TTL
-    return result
+    cache_key = get_cache_key(request, "roles", namespaces=["roles"])
+    return cached_response(
+        cache_key,
+        CACHE_TTL_LONG,  # 24 hr TTL
+        lambda: list_roles(db),
+        BaseResponse,
+    )
 
 
 @router.post("/permissions", response_model=BaseResponse)
@@ -78,7 +77,7 @@ def create_permission_route(
     db: Session = Depends(get_db),
 ):
     result = create_permission(perm_input, db)
-    invalidate_cache("permissions:")
+    invalidate_cache("permissions")
     return result
 
 
@@ -89,13 +88,13 @@ def list_permissions_route(
     current_admin: Admin = Depends(check_permission("rbac:view_permissions")),
     db: Session = Depends(get_db),
 ):
-    cache_key = get_cache_key(request, "permissions")
-    cached = get_from_cache(cache_key)
-    if cached:
-        return BaseResponse(**cached)
-    result = list_permissions(db)
-    set_to_cache(cache_key, result, CACHE_TTL_LONG)  # 24 hr TTL
-    return result
+    cache_key = get_cache_key(request, "permissions", namespaces=["permissions"])
+    return cached_response(
+        cache_key,
+        CACHE_TTL_LONG,  # 24 hr TTL
+        lambda: list_permissions(db),
+        BaseResponse,
+    )
 
 
 @router.post("/role_permissions", response_model=BaseResponse)
@@ -107,7 +106,7 @@ def assign_permissions_to_role_route(
     db: Session = Depends(get_db),
 ):
     result = assign_permissions_to_role(rp, db)
-    invalidate_cache(f"role_permissions:{rp.RoleID}")
+    invalidate_cache(f"role:{rp.RoleID}")
     return result
 
 
@@ -120,7 +119,7 @@ def remove_permissions_from_role_route(
     db: Session = Depends(get_db),
 ):
     result = remove_permissions_from_role(rp_remove, db)
-    invalidate_cache(f"role_permissions:{rp_remove.RoleID}")
+    invalidate_cache(f"role:{rp_remove.RoleID}")
     return result
 
 
@@ -132,13 +131,18 @@ def list_role_permissions_route(
     current_admin: Admin = Depends(check_permission("rbac:view_roles")),
     db: Session = Depends(get_db),
 ):
-    cache_key = get_cache_key(request, f"role_permissions:{role_id}")
-    cached = get_from_cache(cache_key)
-    if cached:
-        return BaseResponse(**cached)
-    result = list_role_permissions(role_id, db)
-    set_to_cache(cache_key, result, CACHE_TTL_LONG)  # 24 hr TTL
-    return result
+    # Also stale when a permission it lists is renamed or deleted
+    cache_key = get_cache_key(
+        request,
+        f"role_permissions:{role_id}",
+        namespaces=[f"role:{role_id}", "permissions"],
+    )
+    return cached_response(
+        cache_key,
+        CACHE_TTL_LONG,  # 24 hr TTL
+        lambda: list_role_permissions(role_id, db),
+        BaseResponse,
+    )
 
 
 @router.put("/roles/{role_id}", response_model=BaseResponse)
@@ -151,8 +155,7 @@ def update_role_route(
     db: Session = Depends(get_db),
 ):
     result = update_role(role_id, role_update, db)
-    invalidate_cache("roles:")
-    invalidate_cache(f"role_permissions:{role_id}")
+    invalidate_cache("roles", f"role:{role_id}")
     return result
 
 
@@ -165,8 +168,7 @@ def delete_role_route(
     db: Session = Depends(get_db),
 ):
     result = delete_role(role_id, db)
-    invalidate_cache("roles:")
-    invalidate_cache(f"role_permissions:{role_id}")
+    invalidate_cache("roles", f"role:{role_id}")
     return result
 
 
@@ -180,7 +182,7 @@ def update_permission_route(
     db: Session = Depends(get_db),
 ):
     result = update_permission(permission_id, perm_update, db)
-    invalidate_cache("permissions:")
+    invalidate_cache("permissions")
     return result
 
 
@@ -193,5 +195,5 @@ def delete_permission_route(
     db: Session = Depends(get_db),
 ):
     result = delete_permission(permission_id, db)
-    invalidate_cache("permissions:")
+    invalidate_cache("permissions")
     return result
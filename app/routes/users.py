@@ -1,7 +1,8 @@
 # app/routes/users.py
 from datetime import date, datetime
-from typing import Optional
-from fastapi import APIRouter, Depends, Query, Request, BackgroundTasks
+from typing import Optional, Union
+from fastapi import APIRouter, Depends, Header, Query, Request, BackgroundTasks
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 # Controllers
@@ -11,7 +12,11 @@ from app.controllers.cards.users import (
     list_cards,
     update_card,
 )
-from app.controllers.transactions.users import get_user_transactions
+from app.controllers.transactions.users import get_user_ledger, get_user_transactions
+from app.controllers.transactions.export_jobs import (
+    download_export_job,
+    get_export_job,
+)
 from app.controllers.transfers.users import create_transfer
 from app.controllers.user_controller import (
     check_field_uniqueness,
@@ -22,6 +27,7 @@ from app.controllers.user_controller import (
     update_current_user,
     update_user_password,
     get_user_analytics_summary,
+    get_user_volume_series,
     get_user_profile,
 )
 from app.controllers.loans.users import (
@@ -51,9 +57,10 @@ from app.schemas.loan_schema import LoanApply, LoanPaymentCreate
 from app.models.user import User
 
 # Core
-from app.core.database import get_db
-from app.core.schemas import BaseResponse, PaginatedResponse
+from app.core.database import get_async_db, get_db, get_read_db
+from app.core.schemas import BaseResponse, CursorPaginatedResponse, PaginatedResponse
 from app.core.auth import get_current_user, refresh_token
+from app.core.idempotency import run_idempotent
 from app.core.rate_limiter import (
     limiter,
     get_redis_client,
@@ -61,8 +68,7 @@ from app.core.rate_limiter import (
     CACHE_TTL_MEDIUM,
     CACHE_TTL_LONG,
     get_cache_key,
-    get_from_cache,
-    set_to_cache,
+    cached_response,
     invalidate_cache,
 )
 import json
@@ -101,12 +107,12 @@ async def send_verification(
         )
 
     cache_key = get_cache_key(request, f"email_verification:{verification.email}")
-    cached = get_from_cache(cache_key)
-    if cached:
-        return BaseResponse(**cached)
-    result = send_verification_email(verification, db)
-    set_to_cache(cache_key, result, CACHE_TTL_SHORT)  # 5 min TTL
-    return result
+    return cached_response(
+        cache_key,
+        CACHE_TTL_SHORT,  # 5 min TTL
+        lambda: send_verification_email(verification, db),
+        BaseResponse,
+    )
 
 
 @router.post("/register", response_model=BaseResponse)
@@ -132,18 +138,38 @@ def refresh(request: Request, token: str, db: Session = Depends(get_db)):
 def get_user_analytics_summary_route(
     request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
-    cache_key = get_cache_key(request, "user_analytics:summary", current_user.UserID)
-    cached = get_from_cache(cache_key)
-    if cached:
-        return BaseResponse(**cached)
-    result = get_user_analytics_summary(current_user.UserID, db)
-    set_to_cache(cache_key, result, CACHE_TTL_SHORT)  # 5 min TTL
-    return result
+    cache_key = get_cache_key(
+        request,
+        "user_analytics:summary",
+        current_user.UserID,
+        namespaces=[f"user:{current_user.UserID}"],
+    )
+    return cached_response(
+        cache_key,
+        CACHE_TTL_SHORT,  # 5 min TTL
+        lambda: get_user_analytics_summary(current_user.UserID, db),
+        BaseResponse,
+    )
 
 
-@router.get("/transactions", response_model=PaginatedResponse)
+@router.get("/analytics/volume", response_model=BaseResponse)
+@limiter.limit(os.getenv("RATE_LIMIT_USER_DEFAULT", "100/hour"))
+def get_user_volume_series_route(
+    request: Request,
+    bucket: str = Query("day", description="day, week or month"),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    return get_user_volume_series(current_user.UserID, db, bucket, start_date, end_date)
+
+
+@router.get(
+    "/transactions", response_model=Union[PaginatedResponse, CursorPaginatedResponse]
+)
 @limiter.limit(os.getenv("RATE_LIMIT_USER_DEFAULT", "100/hour"))
 def list_user_transactions(
     request: Request,
@@ -158,6 +184,10 @@ def list_user_transactions(
     end_date: Optional[date] = Query(None),
     sort_by: Optional[str] = Query("CreatedAt"),
     order: Optional[str] = Query("desc"),
+    cursor: Optional[str] = Query(
+        None, description="Opaque keyset cursor; pass an empty value for page one"
+    ),
+    include_total: bool = Query(False),
 ):
     query_params = {
         "page": params.page,
@@ -168,27 +198,47 @@ def list_user_transactions(
         "end_date": str(end_date),
         "sort_by": sort_by,
         "order": order,
+        "cursor": cursor,
+        "include_total": include_total,
     }
     cache_key = get_cache_key(
-        request, "user_transactions", current_user.UserID, query_params
-    )
-    cached = get_from_cache(cache_key)
-    if cached:
-        return PaginatedResponse(**cached)
-    result = get_user_transactions(
+        request,
+        "user_transactions",
         current_user.UserID,
-        db,
-        params.page,
-        params.per_page,
-        transaction_type,
-        transaction_status,
-        start_date,
-        end_date,
-        sort_by,
-        order,
+        query_params,
+        namespaces=[f"user:{current_user.UserID}"],
+    )
+    return cached_response(
+        cache_key,
+        CACHE_TTL_SHORT,  # 5 min TTL
+        lambda: get_user_transactions(
+            current_user.UserID,
+            db,
+            params.page,
+            params.per_page,
+            transaction_type,
+            transaction_status,
+            start_date,
+            end_date,
+            sort_by,
+            order,
+            cursor,
+            include_total,
+        ),
+        CursorPaginatedResponse if cursor is not None else PaginatedResponse,
     )
-    set_to_cache(cache_key, result.model_dump(), CACHE_TTL_SHORT)  # 5 min TTL
-    return result
+
+
+@router.get("/ledger", response_model=CursorPaginatedResponse)
+@limiter.limit(os.getenv("RATE_LIMIT_USER_DEFAULT", "100/hour"))
+def list_user_ledger(
+    request: Request,
+    per_page: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    return get_user_ledger(current_user.UserID, db, per_page, cursor)
 
 
 @router.post("/transfer", response_model=BaseResponse)
@@ -198,12 +248,28 @@ async def create_transfer_route(
     transfer: TransferCreate,
     background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
 ):
-    result = await create_transfer(current_user.UserID, transfer, db, background_tasks)
-    invalidate_cache(f"user_analytics:summary:user:{current_user.UserID}")
-    invalidate_cache(f"user_transactions:user:{current_user.UserID}")
-    return result
+    async def transfer_once():
+        result = await create_transfer(
+            current_user.UserID, transfer, db, background_tasks
+        )
+        invalidate_cache(
+            f"user:{current_user.UserID}",
+            f"user:{result['data']['ReceiverID']}",
+            "transactions",
+            "analytics",
+        )
+        return result
+
+    return await run_idempotent(
+        db,
+        idempotency_key,
+        f"transfer:user:{current_user.UserID}",
+        transfer,
+        transfer_once,
+    )
 
 
 @router.get("/cards", response_model=PaginatedResponse)
@@ -220,13 +286,19 @@ def list_cards_route(
     db: Session = Depends(get_db),
 ):
     params = {"page": page, "per_page": per_page, "sort_by": sort_by, "order": order}
-    cache_key = get_cache_key(request, "user_cards", current_user.UserID, params)
-    cached = get_from_cache(cache_key)
-    if cached:
-        return PaginatedResponse(**cached)
-    result = list_cards(current_user.UserID, db, page, per_page, sort_by, order)
-    set_to_cache(cache_key, result.model_dump(), CACHE_TTL_MEDIUM)
-    return result
+    cache_key = get_cache_key(
+        request,
+        "user_cards",
+        current_user.UserID,
+        params,
+        namespaces=[f"user:{current_user.UserID}"],
+    )
+    return cached_response(
+        cache_key,
+        CACHE_TTL_MEDIUM,
+        lambda: list_cards(current_user.UserID, db, page, per_page, sort_by, order),
+        PaginatedResponse,
+    )
 
 
 @router.post("/cards", response_model=BaseResponse)
@@ -238,7 +310,7 @@ def create_card_route(
     db: Session = Depends(get_db),
 ):
     result = create_card(current_user.UserID, card, db)
-    invalidate_cache(f"user_cards:user:{current_user.UserID}")
+    invalidate_cache(f"user:{current_user.UserID}", "cards")
     return result
 
 
@@ -252,7 +324,7 @@ def update_card_route(
     db: Session = Depends(get_db),
 ):
     result = update_card(current_user.UserID, card_id, card_update, db)
-    invalidate_cache(f"user_cards:user:{current_user.UserID}")
+    invalidate_cache(f"user:{current_user.UserID}", "cards")
     return result
 
 
@@ -265,7 +337,7 @@ def delete_card_route(
     db: Session = Depends(get_db),
 ):
     result = delete_card(current_user.UserID, card_id, db)
-    invalidate_cache(f"user_cards:user:{current_user.UserID}")
+    invalidate_cache(f"user:{current_user.UserID}", "cards")
     return result
 
 
@@ -278,8 +350,7 @@ def apply_for_loan(
     db: Session = Depends(get_db),
 ):
     result = apply_loan(current_user.UserID, loan, db)
-    invalidate_cache(f"user_loans:user:{current_user.UserID}")
-    invalidate_cache(f"user_analytics:summary:user:{current_user.UserID}")
+    invalidate_cache(f"user:{current_user.UserID}", "loans", "analytics")
     return result
 
 
@@ -291,12 +362,12 @@ def list_loan_types(
     current_user: User = Depends(get_current_user),
 ):
     cache_key = get_cache_key(request, "loan_types")
-    cached = get_from_cache(cache_key)
-    if cached:
-        return BaseResponse(**cached)
-    result = get_loan_types(db)
-    set_to_cache(cache_key, result, CACHE_TTL_LONG)  # 24 hr TTL for static data
-    return result
+    return cached_response(
+        cache_key,
+        CACHE_TTL_LONG,  # 24 hr TTL for static data
+        lambda: get_loan_types(db),
+        BaseResponse,
+    )
 
 
 @router.post("/loans/payments", response_model=BaseResponse)
@@ -308,8 +379,7 @@ def record_loan_payment(
     db: Session = Depends(get_db),
 ):
     result = make_loan_payment(current_user.UserID, payment, db)
-    invalidate_cache(f"user_loans:user:{current_user.UserID}")
-    invalidate_cache(f"user_analytics:summary:user:{current_user.UserID}")
+    invalidate_cache(f"user:{current_user.UserID}", "loans", "analytics")
     return result
 
 
@@ -332,15 +402,21 @@ def list_user_loans(
         "sort_by": sort_by,
         "order": order,
     }
-    cache_key = get_cache_key(request, "user_loans", current_user.UserID, params)
-    cached = get_from_cache(cache_key)
-    if cached:
-        return PaginatedResponse(**cached)
-    result = get_user_loans(
-        current_user.UserID, db, page, per_page, status, sort_by, order
+    cache_key = get_cache_key(
+        request,
+        "user_loans",
+        current_user.UserID,
+        params,
+        namespaces=[f"user:{current_user.UserID}"],
+    )
+    return cached_response(
+        cache_key,
+        CACHE_TTL_MEDIUM,  # 1 hr TTL
+        lambda: get_user_loans(
+            current_user.UserID, db, page, per_page, status, sort_by, order
+        ),
+        PaginatedResponse,
     )
-    set_to_cache(cache_key, result.model_dump(), CACHE_TTL_MEDIUM)  # 1 hr TTL
-    return result
 
 
 @router.get("/loans/{loan_id}/payments", response_model=PaginatedResponse)
@@ -355,14 +431,18 @@ def list_loan_payments(
 ):
     params = {"page": page, "per_page": per_page}
     cache_key = get_cache_key(
-        request, f"user_loan_payments:{loan_id}", current_user.UserID, params
+        request,
+        f"user_loan_payments:{loan_id}",
+        current_user.UserID,
+        params,
+        namespaces=[f"user:{current_user.UserID}"],
+    )
+    return cached_response(
+        cache_key,
+        CACHE_TTL_MEDIUM,  # 1 hr TTL
+        lambda: get_loan_payments(current_user.UserID, loan_id, db, page, per_page),
+        PaginatedResponse,
     )
-    cached = get_from_cache(cache_key)
-    if cached:
-        return PaginatedResponse(**cached)
-    result = get_loan_payments(current_user.UserID, loan_id, db, page, per_page)
-    set_to_cache(cache_key, result.model_dump(), CACHE_TTL_MEDIUM)  # 1 hr TTL
-    return result
 
 
 @router.get("/me", response_model=BaseResponse)
@@ -372,13 +452,17 @@ def get_current_user_route(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    cache_key = get_cache_key(request, f"user:{current_user.UserID}")
-    cached = get_from_cache(cache_key)
-    if cached:
-        return BaseResponse(**cached)
-    result = get_user_profile(current_user.UserID, db)
-    set_to_cache(cache_key, result, CACHE_TTL_MEDIUM)  # 1 hr TTL
-    return result
+    cache_key = get_cache_key(
+        request,
+        f"user:{current_user.UserID}",
+        namespaces=[f"user:{current_user.UserID}"],
+    )
+    return cached_response(
+        cache_key,
+        CACHE_TTL_MEDIUM,  # 1 hr TTL
+        lambda: get_user_profile(current_user.UserID, db),
+        BaseResponse,
+    )
 
 
 @router.put("/me", response_model=BaseResponse)
@@ -390,7 +474,7 @@ def update_current_user_route(
     db: Session = Depends(get_db),
 ):
     result = update_current_user(current_user.UserID, user_update, db)
-    invalidate_cache(f"user_analytics:summary:user:{current_user.UserID}")
+    invalidate_cache(f"user:{current_user.UserID}", "users")
     return result
 
 
@@ -413,8 +497,14 @@ def export_user_transactions_route(
     end_date: Optional[datetime] = Query(None),
     transaction_status: Optional[str] = Query(None),
     transaction_type: Optional[str] = Query(None),
+    background: bool = Query(
+        False, description="Queue the export as a job instead of streaming it"
+    ),
+    export_format: str = Query(
+        "csv", alias="format", description="csv, ndjson, parquet or arrow"
+    ),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     return export_user_transactions(
         current_user.UserID,
@@ -423,4 +513,28 @@ def export_user_transactions_route(
         end_date,
         transaction_status,
         transaction_type,
+        background,
+        export_format,
+    )
+
+
+@router.get("/transactions/export/jobs/{job_id}", response_model=BaseResponse)
+@limiter.limit(os.getenv("RATE_LIMIT_USER_DEFAULT", "100/hour"))
+def get_user_export_job_route(
+    request: Request,
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+):
+    return get_export_job(job_id, f"user:{current_user.UserID}")
+
+
+@router.get("/transactions/export/jobs/{job_id}/download")
+@limiter.limit(os.getenv("RATE_LIMIT_USER_DEFAULT", "100/hour"))
+def download_user_export_job_route(
+    request: Request,
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+):
+    return download_export_job(
+        job_id, f"user:{current_user.UserID}", request.headers.get("Range")
     )
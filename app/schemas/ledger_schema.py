@@ -0,0 +1,23 @@
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict
+from typing import Optional
+
+
+class LedgerEntryResponse(BaseModel):
+    EntryID: int
+    UserID: int
+    Sequence: int
+    TransactionType: str
+    TransactionID: int
+    CounterpartyID: Optional[int] = None
+    Amount: float
+    BalanceAfter: float
+    ReferenceNumber: Optional[str] = None
+    Description: Optional[str] = None
+    CreatedAt: Optional[datetime] = None
+    model_config = ConfigDict(
+        from_attributes=True,
+        json_encoders={
+            datetime: lambda v: v.isoformat() if v else None,
+        },
+    )
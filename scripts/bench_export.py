@@ -0,0 +1,94 @@
+"""
+Export encoding throughput benchmark.
+
+Builds N synthetic transaction rows and times `encode_export` for each
+format, reporting rows/s and MB/s. Only the encoders are measured; rows
+are generated in memory, so no database is needed.
+
+    python -m scripts.bench_export --rows 200000 --chunk-size 1000
+"""
+
+import argparse
+import os
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+# Importing the exports module builds (but never connects) the engines
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.controllers.transactions.exports import (  # noqa: E402
+    COLUMNAR_FORMATS,
+    EXPORT_FORMATS,
+    EXPORT_HEADERS,
+    encode_export,
+)
+
+ExportRow = namedtuple("ExportRow", EXPORT_HEADERS)
+TYPES = ("Transfer", "Deposit", "Withdrawal")
+
+
+def build_rows(count: int):
+    start = datetime(2024, 1, 1)
+    return [
+        ExportRow(
+            TransactionID=i,
+            Username=f"user{i % 5000}",
+            Amount=Decimal(i % 100000) / 100,
+            Status="Completed",
+            CreatedAt=start + timedelta(seconds=i * 7),
+            TransactionType=TYPES[i % 3],
+            ReceiverUsername=f"user{(i + 1) % 5000}" if i % 3 == 0 else None,
+        )
+        for i in range(count)
+    ]
+
+
+def chunked(rows, size: int):
+    for i in range(0, len(rows), size):
+        yield rows[i : i + size]
+
+
+def bench(rows, export_format: str, chunk_size: int, repeat: int):
+    best, size = float("inf"), 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = sum(
+            len(part)
+            for part in encode_export(chunked(rows, chunk_size), export_format)
+        )
+        best = min(best, time.perf_counter() - started)
+    return best, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3, help="Best of N runs")
+    parser.add_argument(
+        "--formats", nargs="+", default=list(EXPORT_FORMATS), choices=EXPORT_FORMATS
+    )
+    args = parser.parse_args()
+
+    rows = build_rows(args.rows)
+    print(f"{args.rows} rows, chunks of {args.chunk_size}, best of {args.repeat}")
+    print(f"{'format':<8} {'seconds':>9} {'rows/s':>12} {'MB':>9} {'MB/s':>9}")
+    for export_format in args.formats:
+        if export_format in COLUMNAR_FORMATS:
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                print(f"{export_format:<8} skipped, pyarrow is not installed")
+                continue
+        seconds, size = bench(rows, export_format, args.chunk_size, args.repeat)
+        megabytes = size / 1e6
+        print(
+            f"{export_format:<8} {seconds:>9.3f} {args.rows / seconds:>12,.0f}"
+            f" {megabytes:>9.2f} {megabytes / seconds:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
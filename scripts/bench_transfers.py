@@ -0,0 +1,131 @@
+"""
+Concurrent transfer contention check.
+
+Fires transfers between the given accounts concurrently, in both directions
+(A->B alongside B->A), through `create_transfer`, and reports throughput.
+Exits non-zero if any transfer deadlocked or otherwise failed, or if the
+balances do not add up: every account must end at its starting balance plus
+what it received minus what it sent, so the total is conserved.
+
+It moves real money between the accounts, so run it against a test database:
+
+    DATABASE_URL=... python -m scripts.bench_transfers --users 1 2 --transfers 2000
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from collections import Counter
+from decimal import Decimal
+from fastapi import BackgroundTasks
+from app.controllers.transfers.users import create_transfer
+from app.core.database import (
+    AsyncSessionLocal,
+    SessionLocal,
+    dispose_async_engine,
+    get_async_engine,
+)
+from app.core.exceptions import CustomHTTPException
+from app.models.user import User
+from app.schemas.transfer_schema import TransferCreate
+
+
+def balances(user_ids):
+    with SessionLocal() as db:
+        return dict(
+            db.query(User.UserID, User.Balance).filter(User.UserID.in_(user_ids))
+        )
+
+
+def usernames(user_ids):
+    with SessionLocal() as db:
+        return dict(
+            db.query(User.UserID, User.Username).filter(User.UserID.in_(user_ids))
+        )
+
+
+async def run(user_ids, names, transfers, concurrency, amount):
+    gate = asyncio.Semaphore(concurrency)
+    moved = Counter()  # UserID -> net amount moved in by completed transfers
+    outcomes = Counter()
+
+    async def one(i):
+        # Neighbours trade in both directions: 1->2, 2->1, 2->3, 3->2, ...
+        sender = user_ids[i // 2 % len(user_ids)]
+        receiver = user_ids[(i // 2 + 1) % len(user_ids)]
+        if i % 2:
+            sender, receiver = receiver, sender
+        transfer = TransferCreate(
+            username=names[receiver], Amount=amount, Description="Contention check"
+        )
+        async with gate:
+            async with AsyncSessionLocal(bind=get_async_engine()) as db:
+                try:
+                    await create_transfer(sender, transfer, db, BackgroundTasks())
+                except CustomHTTPException as e:
+                    message = e.detail["message"]
+                    error = e.detail["data"].get("error", "")
+                    if "deadlock" in error.lower() or "1205" in error:
+                        outcomes["deadlocked"] += 1
+                    elif e.status_code == 400:
+                        outcomes[message] += 1  # e.g. an exhausted balance
+                    else:
+                        outcomes[f"failed: {message} {error}"] += 1
+                    return
+        moved[sender] -= amount
+        moved[receiver] += amount
+        outcomes["completed"] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(transfers)))
+    seconds = time.perf_counter() - started
+    await dispose_async_engine()
+    return moved, outcomes, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--transfers", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--amount", type=Decimal, default=Decimal("0.01"))
+    args = parser.parse_args()
+    if len(set(args.users)) < 2:
+        parser.error("--users needs at least two distinct accounts")
+
+    names = usernames(args.users)
+    missing = set(args.users) - set(names)
+    if missing:
+        parser.error(f"no such users: {sorted(missing)}")
+    before = balances(args.users)
+    moved, outcomes, seconds = asyncio.run(
+        run(args.users, names, args.transfers, args.concurrency, args.amount)
+    )
+    after = balances(args.users)
+
+    print(
+        f"{args.transfers} transfers between {len(args.users)} accounts,"
+        f" {args.concurrency} at a time: {seconds:.2f}s,"
+        f" {outcomes['completed'] / seconds:,.0f} completed/s"
+    )
+    for outcome, count in outcomes.most_common():
+        print(f"  {count:>7} {outcome}")
+
+    ok = not outcomes["deadlocked"] and all(
+        not outcome.startswith("failed") for outcome in outcomes
+    )
+    for user_id in args.users:
+        expected = before[user_id] + moved[user_id]
+        if after[user_id] != expected:
+            ok = False
+            print(f"  user {user_id}: balance {after[user_id]}, expected {expected}")
+    if sum(after.values()) != sum(before.values()):
+        ok = False
+        print(f"  total {sum(after.values())}, was {sum(before.values())}")
+    print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()